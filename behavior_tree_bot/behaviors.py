@@ -3,39 +3,59 @@ sys.path.insert(0, '../')
 from planet_wars import issue_order
 
 
-def attack_weakest_enemy_planet(state):
-    # (1) If we currently have a fleet in flight, abort plan.
-    if len(state.my_fleets()) >= 1:
+# Queries shared by several actions in one tick are kept on the state's blackboard, which drops them as soon as
+# an order changes the planets they were computed from.
+def strongest_planet(state):
+    return state.blackboard.get('strongest planet',
+                                lambda: max(state.my_planets(), key=lambda p: p.num_ships, default=None),
+                                [('planets', 1)])
+
+
+def weakest_enemy_planet(state):
+    return state.blackboard.get('weakest enemy planet',
+                                lambda: min(state.enemy_planets(), key=lambda p: p.num_ships, default=None),
+                                [('planets', 2)])
+
+
+def weakest_neutral_planet(state):
+    return state.blackboard.get('weakest neutral planet',
+                                lambda: min(state.neutral_planets(), key=lambda p: p.num_ships, default=None),
+                                [('planets', 0)])
+
+
+def attack_weakest_enemy_planet(state, fraction=0.5, max_fleets=1):
+    # (1) If we currently have max_fleets fleets in flight, abort plan.
+    if state.num_fleets(1) >= max_fleets:
         return False
 
     # (2) Find my strongest planet.
-    strongest_planet = max(state.my_planets(), key=lambda t: t.num_ships, default=None)
+    strongest = strongest_planet(state)
 
     # (3) Find the weakest enemy planet.
-    weakest_planet = min(state.enemy_planets(), key=lambda t: t.num_ships, default=None)
+    weakest = weakest_enemy_planet(state)
 
-    if not strongest_planet or not weakest_planet:
+    if not strongest or not weakest:
         # No legal source or destination
         return False
     else:
-        # (4) Send half the ships from my strongest planet to the weakest enemy planet.
-        return issue_order(state, strongest_planet.ID, weakest_planet.ID, strongest_planet.num_ships / 2)
+        # (4) Send a fraction (half by default) of the ships from my strongest planet to the weakest enemy planet.
+        return issue_order(state, strongest.ID, weakest.ID, strongest.num_ships * fraction)
 
 
-def spread_to_weakest_neutral_planet(state):
-    # (1) If we currently have a fleet in flight, just do nothing.
-    if len(state.my_fleets()) >= 1:
+def spread_to_weakest_neutral_planet(state, fraction=0.5, max_fleets=1):
+    # (1) If we currently have max_fleets fleets in flight, just do nothing.
+    if state.num_fleets(1) >= max_fleets:
         return False
 
     # (2) Find my strongest planet.
-    strongest_planet = max(state.my_planets(), key=lambda p: p.num_ships, default=None)
+    strongest = strongest_planet(state)
 
     # (3) Find the weakest neutral planet.
-    weakest_planet = min(state.neutral_planets(), key=lambda p: p.num_ships, default=None)
+    weakest = weakest_neutral_planet(state)
 
-    if not strongest_planet or not weakest_planet:
+    if not strongest or not weakest:
         # No legal source or destination
         return False
     else:
-        # (4) Send half the ships from my strongest planet to the weakest enemy planet.
-        return issue_order(state, strongest_planet.ID, weakest_planet.ID, strongest_planet.num_ships / 2)
+        # (4) Send a fraction (half by default) of the ships from my strongest planet to the weakest enemy planet.
+        return issue_order(state, strongest.ID, weakest.ID, strongest.num_ships * fraction)
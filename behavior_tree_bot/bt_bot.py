@@ -6,17 +6,21 @@
 // starting point, or you can throw it out entirely and replace it with your
 // own.
 """
-import logging, traceback, sys, os, inspect
-logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
+import logging, traceback, sys, os, inspect, time, json
+from functools import partial, update_wrapper
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
 from behavior_tree_bot.behaviors import *
 from behavior_tree_bot.checks import *
-from behavior_tree_bot.bt_nodes import Selector, Sequence, Action, Check
+from behavior_tree_bot import behaviors, checks
+from behavior_tree_bot.bt_nodes import Selector, Sequence, Action, Check, Budget, UtilitySelector, compile_tree
 
-from planet_wars import PlanetWars, finish_turn
+from planet_wars import PlanetWars, finish_turn, read_turns
+
+# PlayGame's per-turn time limit (see run.py), in seconds.
+TURN_TIME_LIMIT = 1.0
 
 
 # You have to improve this tree or create an entire new one that is capable
@@ -39,28 +43,70 @@ def setup_behavior_tree():
 
     root.child_nodes = [offensive_plan, spread_sequence, attack.copy()]
 
-    logging.info('\n' + root.tree_to_string())
-    return root
+    # Keep the end of the turn for a single cheap attack, so that a slow strategy can't make the bot time out.
+    budget = Budget(name='Turn Time Budget', reserve=0.1)
+    budget.child_nodes = [root, attack.copy()]
+
+    logging.info('\n' + budget.tree_to_string())
+    return budget
+
+def _bind(function, settings):
+    # Keeps the function's name, which the tree's log shows for every Check and Action.
+    return update_wrapper(partial(function, **settings), function) if settings else function
+
+
+def tree_from_spec(spec):
+    """
+        Builds a tree from a spec such as the ones tuner.py writes: a list of strategies tried in order, each some
+        checks followed by an action, and the fallback action for when the turn is nearly over. Checks and actions
+        are named after the functions in checks.py and behaviors.py, with optional keyword settings. A spec with
+        a "utility" entry (settings, possibly empty) issues the best scored orders first (see utility.py) and tries
+        the strategies only when there are none.
+    """
+    strategies = []
+    for index, strategy in enumerate(spec['strategies']):
+        nodes = [Check(_bind(getattr(checks, check['name']), check.get('settings', {})))
+                 for check in strategy.get('checks', [])]
+        action = strategy['action']
+        nodes.append(Action(_bind(getattr(behaviors, action['name']), action.get('settings', {}))))
+        strategies.append(Sequence(nodes, name='Strategy %d' % (index + 1)) if len(nodes) > 1 else nodes[0])
+    if 'utility' in spec:
+        root = UtilitySelector(strategies, name='Scored Orders, then Strategies', **spec['utility'])
+    else:
+        root = Selector(strategies, name='High Level Ordering of Strategies')
+
+    fallback = spec['fallback']
+    budget = Budget(name='Turn Time Budget', reserve=spec.get('reserve', 0.1))
+    budget.child_nodes = [root, Action(_bind(getattr(behaviors, fallback['name']), fallback.get('settings', {})))]
+
+    logging.info('\n' + budget.tree_to_string())
+    return budget
 
 # You don't need to change this function
 def do_turn(state):
-    behavior_tree.execute(planet_wars)
+    behavior_tree.execute(state)
 
 if __name__ == '__main__':
     logging.basicConfig(filename=__file__[:-3] + '.log', filemode='w', level=logging.DEBUG)
 
-    behavior_tree = setup_behavior_tree()
+    # Run with PLANET_WARS_TRACE=1 to record every node's result (see tracing.py), and with
+    # PLANET_WARS_TREE=<spec.json> to play a tree written by tuner.py instead of setup_behavior_tree's.
+    spec_path = os.environ.get('PLANET_WARS_TREE')
+    if spec_path:
+        with open(spec_path) as spec_file:
+            behavior_tree = compile_tree(tree_from_spec(json.load(spec_file)))
+    else:
+        behavior_tree = compile_tree(setup_behavior_tree())
     try:
-        map_data = ''
-        while True:
-            current_line = input()
-            if len(current_line) >= 2 and current_line.startswith("go"):
-                planet_wars = PlanetWars(map_data)
-                do_turn(planet_wars)
-                finish_turn()
-                map_data = ''
-            else:
-                map_data += current_line + '\n'
+        planet_wars = PlanetWars()
+        for turn, map_data in enumerate(read_turns(), 1):
+            turn_start = time.perf_counter()
+            planet_wars.deadline = turn_start + TURN_TIME_LIMIT
+            planet_wars.update(map_data)
+            do_turn(planet_wars)
+            finish_turn()
+            # Logged once the orders are sent, so it doesn't count against the turn.
+            logging.info('Turn %d took %.1f ms', turn, (time.perf_counter() - turn_start) * 1000)
 
     except KeyboardInterrupt:
         print('ctrl-c, leaving ...')
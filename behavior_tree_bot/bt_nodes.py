@@ -1,14 +1,54 @@
 from copy import deepcopy
-import logging
+from functools import partial, update_wrapper
+import tracing, profiling
+from behavior_tree_bot.rollouts import plan_with_rollouts
+from behavior_tree_bot.endgame import solve_endgame
+from behavior_tree_bot.utility import issue_best_orders
 
 
 def log_execution(fn):
-    def logged_fn(self, state):
-        logging.debug('Executing:' + str(self))
+    """
+        Marks a node's execute method for tracing and profiling. The method itself is left untouched, so neither
+        costs anything until set_tracing(True) or set_profiling(True) swaps in the recording version.
+    """
+    def traced_fn(self, state):
+        ID = tracing.node_ID(self)
+        tracing.record(tracing.ENTER, ID)
         result = fn(self, state)
-        logging.debug('Result: ' + str(self) + ' -> ' + ('Success' if result else 'Failure'))
+        tracing.record(tracing.EXIT, ID, result=result)
         return result
-    return logged_fn
+
+    def profiled_fn(self, state):
+        profiling.enter(self)
+        result = fn(self, state)
+        profiling.leave(result)
+        return result
+
+    traced_fn.untraced = profiled_fn.untraced = fn
+    fn.traced, fn.profiled = traced_fn, profiled_fn
+    return fn
+
+
+def _instrument(version):
+    # Switches every node class's execute to its plain (version None), traced or profiled version.
+    classes = [Node]
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        execute = cls.__dict__.get('execute')
+        plain = getattr(execute, 'untraced', execute)
+        if hasattr(plain, 'traced'):
+            cls.execute = getattr(plain, version) if version else plain
+
+
+def set_tracing(enabled):
+    """ Switches every node class between its plain and its traced execute. """
+    _instrument('traced' if enabled else None)
+
+
+def set_profiling(enabled):
+    """ Switches every node class between its plain and its profiled execute. """
+    _instrument('profiled' if enabled else None)
 
 
 ############################### Base Classes ##################################
@@ -67,6 +107,46 @@ class Sequence(Composite):
             return True
 
 
+class Budget(Composite):
+    """
+        Runs its first child while more than `reserve` seconds of the turn are left, and otherwise its second child:
+        a cheap fallback that is always safe to run when time is nearly gone.
+    """
+    def __init__(self, child_nodes=[], name=None, reserve=0.1):
+        super().__init__(child_nodes, name)
+        self.reserve = reserve
+
+    @log_execution
+    def execute(self, state):
+        if state.time_left() > self.reserve:
+            return self.child_nodes[0].execute(state)
+        elif len(self.child_nodes) > 1:
+            return self.child_nodes[1].execute(state)
+        else:
+            return False
+
+
+class UtilitySelector(Composite):
+    """
+        Scores the tick's candidate orders, each of our planets against its nearest ones (see utility.py), and
+        issues the best ones that don't conflict; only when none is worth issuing does it try its children in order,
+        like a Selector. Settings such as max_orders, max_targets, horizon and time_share are passed on to
+        issue_best_orders.
+    """
+    def __init__(self, child_nodes=[], name=None, **settings):
+        super().__init__(child_nodes, name)
+        self.settings = settings
+
+    @log_execution
+    def execute(self, state):
+        if issue_best_orders(state, **self.settings):
+            return True
+        for child_node in self.child_nodes:
+            if child_node.execute(state):
+                return True
+        return False
+
+
 ############################### Leaf Nodes ##################################
 class Check(Node):
     def __init__(self, check_function):
@@ -81,12 +161,119 @@ class Check(Node):
 
 
 class Action(Node):
-    def __init__(self, action_function):
+    def __init__(self, action_function, min_time=0):
         self.action_function = action_function
+        # Expensive actions set the time, in seconds, they need; with less left in the turn they fail without running.
+        self.min_time = min_time
 
     @log_execution
     def execute(self, state):
+        if self.min_time and state.time_left() < self.min_time:
+            return False
         return self.action_function(state)
 
     def __str__(self):
         return self.__class__.__name__ + ': ' + self.action_function.__name__
+
+
+class ConfiguredAction(Action):
+    """ An Action whose function also takes keyword settings, given once to the node and passed on at every call. """
+    def __init__(self, action_function, min_time=0, **settings):
+        # Keeps the function's name, which the tree's string and trace show.
+        super().__init__(update_wrapper(partial(action_function, **settings), action_function), min_time)
+        self.settings = settings
+
+
+class Rollout(ConfiguredAction):
+    """
+        Plans the turn with Monte Carlo rollouts (see rollouts.py). Settings such as horizon, batch_size, max_rollouts
+        and time_share are passed on to plan_with_rollouts.
+    """
+    def __init__(self, min_time=0.05, **settings):
+        super().__init__(plan_with_rollouts, min_time, **settings)
+
+
+class Endgame(ConfiguredAction):
+    """
+        Searches endgames exactly (see endgame.py) and fails while the enemy still has many planets. Settings such as
+        max_enemy_planets, max_depth and time_share are passed on to solve_endgame.
+    """
+    def __init__(self, min_time=0.05, **settings):
+        super().__init__(solve_endgame, min_time, **settings)
+
+
+if profiling.enabled:
+    set_profiling(True)
+else:
+    set_tracing(tracing.enabled)
+
+
+############################### Compiled Trees ##################################
+# Every level of a compiled tree nests one more parenthesised group, and CPython refuses to compile more than 200 of
+# them, so nodes deeper than this run through their own execute instead.
+MAX_COMPILE_DEPTH = 50
+
+
+class CompiledTree(Node):
+    """
+        A behavior tree flattened into a single generated function with the same Selector/Sequence/Check/Action
+        semantics, but without the per-node logging wrapper and method dispatch. Nodes of any other type, and
+        those more than MAX_COMPILE_DEPTH levels deep, are called through their own execute.
+    """
+    def __init__(self, root):
+        self.root = root
+        if tracing.enabled or profiling.enabled:
+            # Traced and profiled trees keep their nodes so that every node shows up in the trace or profile.
+            self.source = None
+            self.execute = root.execute
+            return
+
+        namespace = {}
+        body = _compile_node(root, namespace)
+        if type(root) in (Selector, Sequence):
+            # Composites return True/False rather than whatever their last child returned.
+            body = 'bool(' + body + ')'
+        self.source = 'def execute(state):\n    return ' + body + '\n'
+        exec(compile(self.source, '<compiled tree: ' + str(root) + '>', 'exec'), namespace)
+        self.execute = namespace['execute']
+
+    def __str__(self):
+        return 'Compiled ' + str(self.root)
+
+    def tree_to_string(self, indent=0):
+        return self.root.tree_to_string(indent)
+
+
+def _compile_node(node, namespace, depth=0):
+    if depth >= MAX_COMPILE_DEPTH:
+        name = 'node_%d' % len(namespace)
+        namespace[name] = node.execute
+        return name + '(state)'
+
+    # Selector and Sequence become short-circuiting `or`/`and` chains, which match their for-loops exactly:
+    # children run in order and stop at the first truthy (Selector) or falsy (Sequence) result.
+    if type(node) in (Selector, Sequence):
+        if not node.child_nodes:
+            return 'False' if type(node) is Selector else 'True'
+        operator = ' or ' if type(node) is Selector else ' and '
+        return '(' + operator.join(_compile_node(child, namespace, depth + 1) for child in node.child_nodes) + ')'
+
+    if type(node) is Budget and node.child_nodes:
+        fallback = _compile_node(node.child_nodes[1], namespace, depth + 1) if len(node.child_nodes) > 1 else 'False'
+        return '(%s if state.time_left() > %r else %s)' % (_compile_node(node.child_nodes[0], namespace, depth + 1),
+                                                           node.reserve, fallback)
+
+    name = 'node_%d' % len(namespace)
+    if type(node) is Check:
+        namespace[name] = node.check_function
+    elif type(node) is Action:
+        namespace[name] = node.action_function
+        if node.min_time:
+            return '(state.time_left() >= %r and %s(state))' % (node.min_time, name)
+    else:
+        namespace[name] = node.execute
+    return name + '(state)'
+
+
+def compile_tree(root):
+    return CompiledTree(root)
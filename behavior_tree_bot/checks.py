@@ -4,8 +4,5 @@ def if_neutral_planet_available(state):
     return any(state.neutral_planets())
 
 
-def have_largest_fleet(state):
-    return sum(planet.num_ships for planet in state.my_planets()) \
-             + sum(fleet.num_ships for fleet in state.my_fleets()) \
-           > sum(planet.num_ships for planet in state.enemy_planets()) \
-             + sum(fleet.num_ships for fleet in state.enemy_fleets())
+def have_largest_fleet(state, margin=1.0):
+    return state.total_ships(1) > state.total_ships(2) * margin
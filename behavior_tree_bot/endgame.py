@@ -0,0 +1,254 @@
+"""
+    Exact endgame search. Once the enemy is down to a few planets and ships, every order the two players can give
+    among the enemy's planets and our strongest ones is searched with depth-limited alpha-beta on the rollout forward
+    model, deepening one turn at a time until the turn's time share runs out. We move first and the opponent answers
+    knowing our move, so the result is a guaranteed outcome rather than a guess about the opponent. Positions are
+    looked up by their Zobrist hash in a bounded LRU transposition table, which is kept across the turns of a game
+    on the same map.
+"""
+import random
+from collections import OrderedDict
+from time import perf_counter
+
+import map_cache
+from planet_wars import issue_order
+from behavior_tree_bot.rollouts import Model
+
+
+# A win is worth more than any ship count, less one per turn it takes, so that faster wins score higher.
+WIN = 10 ** 9
+EXACT, LOWER, UPPER = range(3)
+
+_random = random.Random(0)
+_zobrist = {}
+
+
+def _feature_key(feature):
+    key = _zobrist.get(feature)
+    if key is None:
+        key = _zobrist[feature] = _random.getrandbits(64)
+    return key
+
+
+def zobrist_hash(model):
+    """ XOR of a random key per (planet, owner, ships), plus a sum of keys per fleet so that equal fleets count. """
+    key = 0
+    for planet, owner in enumerate(model.owner):
+        key ^= _feature_key((planet, owner, model.ships[planet]))
+    for fleet in model.fleets:
+        key += _feature_key(fleet)
+    return key & 0xFFFFFFFFFFFFFFFF
+
+
+class TranspositionTable:
+    """ Search results by position hash, dropping the least recently used entry beyond `capacity`. """
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
+def _to_table(value, turns):
+    # Wins and losses are scored by their distance from the search's root; the table stores them by their distance
+    # from the position itself, so that the entry holds for any root, on this turn or a later one.
+    if value > WIN // 2:
+        return value + turns
+    elif value < -WIN // 2:
+        return value - turns
+    return value
+
+
+def _from_table(value, turns):
+    if value > WIN // 2:
+        return value - turns
+    elif value < -WIN // 2:
+        return value + turns
+    return value
+
+
+class _Timeout(Exception):
+    pass
+
+
+def focus_planets(model, max_sources):
+    """ The enemy's planets and our max_sources planets with the most ships: the ones the search gives orders for. """
+    ours = sorted((planet for planet, owner in enumerate(model.owner) if owner == 1),
+                  key=model.ships.__getitem__, reverse=True)
+    return sorted(ours[:max_sources] + [planet for planet, owner in enumerate(model.owner) if owner == 2])
+
+
+def moves(model, player, targets):
+    """ Holding, or one fleet from a planet of the player to another target: everything, or just enough. """
+    result = [None]
+    for source in targets:
+        ships = model.ships[source]
+        if model.owner[source] != player or ships <= 0:
+            continue
+        for target in targets:
+            if target == source:
+                continue
+            result.append((source, target, ships))
+            if model.owner[target] != player:
+                needed = model.ships[target] + model.distances[source][target] * model.growth[target] + 1
+                if needed < ships:
+                    result.append((source, target, needed))
+    return result
+
+
+class Solver:
+    def __init__(self, table=None, growth_weight=10, max_sources=3):
+        self.table = table or TranspositionTable()
+        self.growth_weight = growth_weight
+        self.max_sources = max_sources
+        self.stop, self.max_nodes = float('inf'), float('inf')
+        self.nodes = 0
+
+    def evaluate(self, model, turns):
+        alive = [False, False, False]
+        for owner in model.owner:
+            alive[owner] = True
+        for fleet in model.fleets:
+            alive[fleet[0]] = True
+        if not alive[2]:
+            return WIN - turns
+        if not alive[1]:
+            return -WIN + turns
+        return model.score(1, self.growth_weight)
+
+    def search(self, model, depth, alpha, beta, turns):
+        """ The value of the position for player 1 with `depth` turns left to search. """
+        self.nodes += 1
+        if self.nodes > self.max_nodes or (self.nodes & 255 == 0 and perf_counter() > self.stop):
+            raise _Timeout()
+        value = self.evaluate(model, turns)
+        if abs(value) > WIN // 2:
+            return value
+        if depth == 0:
+            # Fleets take longer to land than the search looks ahead, so leaves are scored once they have. Each step
+            # costs a pass over the planets, so the clock is read on every one.
+            model = model.copy()
+            while model.fleets:
+                if perf_counter() > self.stop:
+                    raise _Timeout()
+                model.step()
+                turns += 1
+            return self.evaluate(model, turns)
+
+        key = zobrist_hash(model)
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, entry_value, flag, best_move = entry
+            entry_value = _from_table(entry_value, turns)
+            if entry_depth >= depth and (flag == EXACT or (flag == LOWER and entry_value >= beta) or
+                                         (flag == UPPER and entry_value <= alpha)):
+                return entry_value
+
+        targets = focus_planets(model, self.max_sources)
+        my_moves = moves(model, 1, targets)
+        if best_move in my_moves:
+            my_moves.remove(best_move)
+            my_moves.insert(0, best_move)
+        their_moves = moves(model, 2, targets)
+
+        original_alpha, best = alpha, -float('inf')
+        for my_move in my_moves:
+            # The opponent answers our move with its best reply.
+            value = float('inf')
+            for their_move in their_moves:
+                child = model.copy()
+                if my_move:
+                    child.send(1, *my_move)
+                if their_move:
+                    child.send(2, *their_move)
+                child.step()
+                value = min(value, self.search(child, depth - 1, alpha, min(beta, value), turns + 1))
+                if value <= alpha:
+                    break
+            if value > best:
+                best, best_move = value, my_move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        flag = UPPER if best <= original_alpha else LOWER if best >= beta else EXACT
+        self.table.put(key, (depth, _to_table(best, turns), flag, best_move))
+        return best
+
+    def solve(self, model, max_depth, stop, max_nodes=float('inf')):
+        """
+            Deepens the search until max_depth, the stop time or max_nodes searched positions; returns the best move
+            of the deepest finished search and its value, or (None, None) if no search finished.
+        """
+        self.stop, self.max_nodes, self.nodes = stop, max_nodes, 0
+        best_move, best_value = None, None
+        for depth in range(1, max_depth + 1):
+            try:
+                value = self.search(model, depth, -float('inf'), float('inf'), 0)
+            except _Timeout:
+                break
+            best_value = value
+            best_move = self.table.get(zobrist_hash(model))[3]
+            if abs(value) > WIN // 2:
+                # Won or lost for sure; searching deeper won't find a faster win.
+                break
+        return best_move, best_value
+
+
+# The solver, and its transposition table, of the map being played: positions are only hashed by owners, ships
+# and fleets, so entries are only valid on the map (and the part of it) they were searched on.
+_solver, _solver_map = Solver(), None
+
+
+def endgame_planets(state, max_planets, max_sources=3):
+    """
+        IDs of the planets the search needs on a map of more than max_planets planets: our max_sources strongest,
+        the enemy's, and those the enemy's fleets are headed to; None on a smaller map.
+    """
+    if len(state.planets) <= max_planets:
+        return None
+    ours = sorted(state.my_planets(), key=lambda planet: planet.num_ships, reverse=True)[:max_sources]
+    return sorted(set([planet.ID for planet in ours + state.enemy_planets()] +
+                      [fleet.destination_planet for fleet in state.enemy_fleets()]))
+
+
+def solve_endgame(state, max_enemy_planets=2, max_enemy_fleets=4, min_advantage=2.0, max_depth=12, time_share=0.5,
+                  max_nodes=50000, max_planets=60):
+    """
+        When the enemy is down to max_enemy_planets planets and max_enemy_fleets fleets, and we have min_advantage
+        times its ships, issues the move the search finds best; otherwise fails so that the rest of the tree can
+        play, as it does when not even a one-turn search finishes in time. max_nodes bounds the search when the turn
+        has no deadline. On maps of more than max_planets planets, only the planets in play are searched (see
+        endgame_planets), leaving out our other planets and fleets.
+    """
+    global _solver, _solver_map
+    if len(state.enemy_planets()) > max_enemy_planets or state.num_fleets(2) > max_enemy_fleets or \
+            state.total_ships(1) < min_advantage * state.total_ships(2) or not state.my_planets():
+        return False
+    planet_IDs = endgame_planets(state, max_planets)
+    map_key = (map_cache.geometry_hash(state.planets), planet_IDs and tuple(planet_IDs))
+    if map_key != _solver_map:
+        _solver, _solver_map = Solver(), map_key
+    model = Model.from_state(state, planet_IDs)
+
+    move, value = _solver.solve(model, max_depth, perf_counter() + state.time_left() * time_share, max_nodes)
+    if value is None:
+        return False
+    if move is not None:
+        source, destination, num_ships = move
+        if planet_IDs is not None:
+            source, destination = planet_IDs[source], planet_IDs[destination]
+        issue_order(state, source, destination, num_ships)
+    # Holding is the solved move too, so it counts as success.
+    return True
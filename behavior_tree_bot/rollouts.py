@@ -0,0 +1,300 @@
+"""
+    Monte Carlo planning. A small forward model of the game plays candidate order sets out a few dozen turns against
+    simple opponent policies modelled on the bots in opponent_bots, and the set with the best average outcome wins.
+    The model keeps only plain lists of owners, ships and fleets, so that hundreds of rollouts fit in one turn.
+"""
+import random
+from time import perf_counter
+
+from planet_wars import issue_order
+
+
+class Model:
+    """ Owners, ships and fleets of a game, stepped with the same growth and battle rules as PlayGame. """
+    __slots__ = ('owner', 'ships', 'growth', 'distances', 'fleets')
+
+    def __init__(self, owner, ships, growth, distances, fleets):
+        self.owner, self.ships, self.growth, self.distances = owner, ships, growth, distances
+        # (owner, ships, destination, turns remaining)
+        self.fleets = fleets
+
+    @classmethod
+    def from_state(cls, state, planet_IDs=None):
+        """
+            The whole game, or with planet_IDs only those planets, numbered in that order, and the fleets headed to
+            them.
+        """
+        if planet_IDs is None:
+            return cls([planet.owner for planet in state.planets], [int(planet.num_ships) for planet in state.planets],
+                       [planet.growth_rate for planet in state.planets], state.distances,
+                       [(fleet.owner, fleet.num_ships, fleet.destination_planet, fleet.turns_remaining)
+                        for fleet in state.fleets])
+        index = {planet_ID: number for number, planet_ID in enumerate(planet_IDs)}
+        planets = [state.planets[planet_ID] for planet_ID in planet_IDs]
+        return cls([planet.owner for planet in planets], [int(planet.num_ships) for planet in planets],
+                   [planet.growth_rate for planet in planets],
+                   [[state.distances[source][destination] for destination in planet_IDs] for source in planet_IDs],
+                   [(fleet.owner, fleet.num_ships, index[fleet.destination_planet], fleet.turns_remaining)
+                    for fleet in state.fleets if fleet.destination_planet in index])
+
+    def copy(self):
+        return Model(self.owner[:], self.ships[:], self.growth, self.distances, self.fleets[:])
+
+    def send(self, player, source, destination, num_ships):
+        # Orders PlayGame would reject are dropped.
+        if self.owner[source] == player and 0 < num_ships <= self.ships[source] and source != destination:
+            self.ships[source] -= num_ships
+            self.fleets.append((player, num_ships, destination, self.distances[source][destination]))
+
+    def step(self):
+        owner, ships = self.owner, self.ships
+        for planet, growth in enumerate(self.growth):
+            if owner[planet]:
+                ships[planet] += growth
+
+        arriving, fleets = {}, []
+        for fleet in self.fleets:
+            if fleet[3] > 1:
+                fleets.append((fleet[0], fleet[1], fleet[2], fleet[3] - 1))
+            else:
+                arriving.setdefault(fleet[2], [0, 0, 0])[fleet[0]] += fleet[1]
+        self.fleets = fleets
+
+        # The largest force takes the planet with what is left after fighting the second largest; on a tie the owner
+        # keeps it with no ships.
+        for planet, forces in arriving.items():
+            forces[owner[planet]] += ships[planet]
+            second, first = sorted(forces)[1:]
+            if first > second:
+                owner[planet] = forces.index(first)
+            ships[planet] = first - second
+
+    def incoming(self, player):
+        """ Ships of `player` on their way to each planet. """
+        incoming = [0] * len(self.owner)
+        for fleet in self.fleets:
+            if fleet[0] == player:
+                incoming[fleet[2]] += fleet[1]
+        return incoming
+
+    def score(self, player, growth_weight):
+        """ Ships and growth of `player` minus those of the other player. """
+        totals, growth = [0, 0, 0], [0, 0, 0]
+        for planet, owner in enumerate(self.owner):
+            totals[owner] += self.ships[planet]
+            growth[owner] += self.growth[planet]
+        for fleet in self.fleets:
+            totals[fleet[0]] += fleet[1]
+        enemy = 3 - player
+        return totals[player] - totals[enemy] + growth_weight * (growth[player] - growth[enemy])
+
+
+############################### Policies ##################################
+# Each policy gives one turn of orders for `player` on the model, like the opponent bot it is named after.
+def _planets(model, owner):
+    return [planet for planet, planet_owner in enumerate(model.owner) if planet_owner == owner]
+
+
+def _capture(model, player, targets, growth_cost):
+    # The opponent bots' greedy walk: weakest source against weakest target, moving on to the next source whenever
+    # one can't afford the target.
+    ships, sources = model.ships, iter(sorted(_planets(model, player), key=model.ships.__getitem__))
+    for target in sorted(targets, key=ships.__getitem__):
+        for source in sources:
+            required = ships[target] + 1
+            if growth_cost:
+                required += model.distances[source][target] * model.growth[target]
+            if ships[source] > required:
+                model.send(player, source, target, required)
+                break
+        else:
+            return
+
+
+def easy(model, player):
+    if any(fleet[0] == player for fleet in model.fleets):
+        return
+    mine, others = _planets(model, player), [planet for planet, owner in enumerate(model.owner) if owner != player]
+    if mine and others:
+        source = max(mine, key=model.ships.__getitem__)
+        model.send(player, source, min(others, key=model.ships.__getitem__), model.ships[source] // 2)
+
+
+def spread(model, player):
+    incoming = model.incoming(player)
+    _capture(model, player, [planet for planet in _planets(model, 0) if not incoming[planet]], False)
+
+
+def attack(model, player):
+    incoming = model.incoming(player)
+    _capture(model, player, [planet for planet in _planets(model, 3 - player) if not incoming[planet]], True)
+
+
+def aggressive(model, player):
+    attack(model, player)
+    spread(model, player)
+
+
+def spread_first(model, player):
+    spread(model, player)
+    attack(model, player)
+
+
+def defensive(model, player):
+    spread(model, player)
+    mine = _planets(model, player)
+    if not mine:
+        return
+    own, enemy = model.incoming(player), model.incoming(3 - player)
+    strength = {planet: model.ships[planet] + own[planet] - enemy[planet] for planet in mine}
+    average = sum(strength.values()) / len(mine)
+    weak = sorted((planet for planet in mine if strength[planet] < average), key=strength.__getitem__)
+    strong = sorted((planet for planet in mine if strength[planet] > average), key=strength.__getitem__, reverse=True)
+    for planet in weak:
+        need = int(average - strength[planet])
+        while need > 0 and strong:
+            have = min(int(strength[strong[0]] - average), model.ships[strong[0]])
+            sent = min(have, need)
+            model.send(player, strong[0], planet, sent)
+            strength[strong[0]] -= sent
+            need -= sent
+            if sent == have:
+                strong.pop(0)
+
+
+def production(model, player):
+    ships = model.ships
+    sources = sorted(_planets(model, player), key=ships.__getitem__, reverse=True)
+    incoming = model.incoming(player)
+    targets = iter(sorted((planet for planet, owner in enumerate(model.owner) if owner != player and not incoming[planet]),
+                          key=ships.__getitem__, reverse=True))
+    for source in sources:
+        for target in targets:
+            required = ships[target] + 1
+            if model.owner[target]:
+                required += model.distances[source][target] * model.growth[target]
+            if ships[source] > required:
+                model.send(player, source, target, required)
+                break
+        else:
+            return
+
+
+OPPONENT_POLICIES = (easy, aggressive, spread_first, defensive, production)
+# How we are assumed to keep playing after this turn.
+OWN_POLICIES = (aggressive, spread_first, defensive)
+
+
+############################### Planning ##################################
+def candidate_orders(model, player=1, max_candidates=12):
+    """
+        Order sets worth comparing: holding, capturing a single planet from the nearest planet that can afford it,
+        all of those captures at once, and the tree's usual half-fleet attack.
+    """
+    ships, distances = model.ships, model.distances
+    mine = _planets(model, player)
+    if not mine:
+        return []
+
+    captures = []
+    for target, owner in enumerate(model.owner):
+        if owner == player:
+            continue
+        for source in sorted(mine, key=distances[target].__getitem__):
+            required = ships[target] + 1 + (distances[source][target] * model.growth[target] if owner else 0)
+            if ships[source] > required:
+                # Cheap, close, fast-growing targets first.
+                value = model.growth[target] / (required + distances[source][target])
+                captures.append((value, (source, target, required)))
+                break
+    captures.sort(reverse=True)
+
+    candidates = [[]] + [[order] for _, order in captures[:max_candidates - 3]]
+    combined, spent = [], {}
+    for _, (source, target, required) in captures:
+        if spent.get(source, 0) + required < ships[source]:
+            spent[source] = spent.get(source, 0) + required
+            combined.append((source, target, required))
+    if len(combined) > 1:
+        candidates.append(combined)
+
+    strongest = max(mine, key=ships.__getitem__)
+    others = [planet for planet, owner in enumerate(model.owner) if owner != player]
+    if others and ships[strongest] // 2 > 0:
+        candidates.append([(strongest, min(others, key=ships.__getitem__), ships[strongest] // 2)])
+    return candidates
+
+
+def rollout(model, orders, rng, horizon, growth_weight, stop=float('inf')):
+    """
+        Plays one order set out `horizon` turns with randomly mixed policies and returns our final score, or None if
+        the stop time passes first.
+    """
+    model = model.copy()
+    for source, destination, num_ships in orders:
+        model.send(1, source, destination, num_ships)
+    rng.choice(OPPONENT_POLICIES)(model, 2)
+    model.step()
+    for _ in range(horizon - 1):
+        if perf_counter() > stop:
+            return None
+        rng.choice(OWN_POLICIES)(model, 1)
+        rng.choice(OPPONENT_POLICIES)(model, 2)
+        model.step()
+    return model.score(1, growth_weight)
+
+
+def local_planets(state, max_planets, horizon, max_sources=4):
+    """
+        IDs of at most max_planets planets around our max_sources strongest ones, nearest first and no further than
+        `horizon` turns from them, or None when the whole map is small enough.
+    """
+    if len(state.planets) <= max_planets:
+        return None
+    sources = sorted(state.my_planets(), key=lambda planet: planet.num_ships, reverse=True)[:max_sources]
+    around = sorted((state.distances[source.ID][planet_ID], planet_ID)
+                    for source in sources for planet_ID in state.neighbours(source.ID)[:max_planets])
+    chosen = dict.fromkeys(source.ID for source in sources)
+    for turns, planet_ID in around:
+        if len(chosen) >= max_planets or turns > horizon:
+            break
+        chosen[planet_ID] = None
+    return list(chosen)
+
+
+def plan_with_rollouts(state, horizon=20, batch_size=4, max_rollouts=400, time_share=0.5, growth_weight=10,
+                       seed=None, max_planets=60):
+    """
+        Issues the candidate order set with the best average rollout score. Rollouts run in batches of batch_size
+        per candidate, until max_rollouts are done or time_share of the turn's remaining time is used up, which is
+        checked on every simulated turn; fails if not one rollout per candidate finished in time. On maps of more
+        than max_planets planets, only that many planets around our strongest ones are simulated.
+    """
+    stop = perf_counter() + state.time_left() * time_share
+    planet_IDs = local_planets(state, max_planets, horizon)
+    model = Model.from_state(state, planet_IDs)
+    candidates = candidate_orders(model)
+    if not candidates:
+        return False
+
+    rng = random.Random(seed)
+    totals, counts, done = [0.0] * len(candidates), [0] * len(candidates), 0
+    while done < max_rollouts and perf_counter() < stop:
+        for index, orders in enumerate(candidates):
+            for _ in range(batch_size):
+                score = rollout(model, orders, rng, horizon, growth_weight, stop)
+                if score is None:
+                    break
+                totals[index] += score
+                counts[index] += 1
+        done += batch_size * len(candidates)
+    if not all(counts):
+        return False
+
+    best = candidates[max(range(len(candidates)), key=lambda index: totals[index] / counts[index])]
+    for source, destination, num_ships in best:
+        if planet_IDs is not None:
+            source, destination = planet_IDs[source], planet_IDs[destination]
+        issue_order(state, source, destination, num_ships)
+    # Holding back is a decision too, so it counts as success.
+    return True
@@ -0,0 +1,77 @@
+"""
+    Utility scoring of many orders at once. Each tick, every one of our planets is paired with its nearest other
+    planets, and every pair becomes a candidate order. Candidates are scored a source at a time, with each quantity
+    (distance, ships arriving in time, ships needed, score) computed over all of the source's targets in one
+    comprehension. These are plain Python lists, not NumPy arrays, because bots run without NumPy. The best
+    candidates are then issued as long as they don't conflict: each target is taken once, and no source sends more
+    than it can spare.
+
+    A candidate's score is what the target is worth over the rest of the horizon, its growth for every turn left
+    after the fleet lands (twice that for an enemy planet, which the enemy also loses, and the garrison on top for
+    one of our planets saved), minus the ships it takes.
+"""
+from time import perf_counter
+
+from planet_wars import issue_order
+
+
+def score_candidates(state, max_targets=24, horizon=40, enemy_weight=2.0, time_share=0.5):
+    """
+        Sources, targets, ships needed and scores of the candidate orders, pairing each of our planets with its
+        max_targets nearest planets (all of them with max_targets=None). Our strongest planets are scored first, and
+        scoring stops once time_share of the turn's remaining time is used up.
+    """
+    distances = state.distances
+    weight = (1.0, 1.0, enemy_weight)
+    stop = perf_counter() + state.time_left() * time_share
+    sources, targets, needed, score = [], [], [], []
+    for source in sorted(state.my_planets(), key=lambda planet: planet.num_ships, reverse=True):
+        if source.num_ships <= 0 or perf_counter() > stop:
+            break
+        row = distances[source.ID]
+        # The k-d tree finds the nearest few without sorting the whole map by distance from every source.
+        neighbours = state.nearest_planets(source.ID, max_targets or len(state.planets))
+        distance = [row[target.ID] for target in neighbours]
+        # Fleets already on the way that land no later than ours would.
+        own_arriving = [state.incoming_ships(target.ID, 1, turns) for target, turns in zip(neighbours, distance)]
+        enemy_arriving = [state.incoming_ships(target.ID, 2, turns) for target, turns in zip(neighbours, distance)]
+        # Enemy planets grow while our fleet travels; ours grow to help defend themselves.
+        source_needed = [int(enemy - own - target.num_ships - target.growth_rate * turns + 1) if target.owner == 1
+                         else int(target.num_ships + (target.growth_rate * turns if target.owner == 2 else 0) +
+                                  enemy - own + 1)
+                         for target, turns, own, enemy in zip(neighbours, distance, own_arriving, enemy_arriving)]
+        sources += [source.ID] * len(neighbours)
+        targets += [target.ID for target in neighbours]
+        needed += source_needed
+        score += [target.growth_rate * max(0, horizon - turns) * weight[target.owner] +
+                  (target.num_ships if target.owner == 1 else 0) - ships
+                  for target, turns, ships in zip(neighbours, distance, source_needed)]
+    return sources, targets, needed, score
+
+
+def issue_best_orders(state, max_orders=5, max_targets=24, horizon=40, enemy_weight=2.0, min_score=0, time_share=0.5):
+    """
+        Issues up to max_orders of the best scoring candidate orders that don't conflict, those scoring over
+        min_score; returns how many were issued. A source keeps back the ships the enemy has on the way to it.
+    """
+    sources, targets, needed, score = score_candidates(state, max_targets, horizon, enemy_weight, time_share)
+    ranked = sorted((index for index, value in enumerate(score) if value > min_score and needed[index] > 0),
+                    key=score.__getitem__, reverse=True)
+
+    issued, taken, senders, spare = 0, set(), set(), {}
+    for index in ranked:
+        source, target, ships = sources[index], targets[index], needed[index]
+        if source not in spare:
+            spare[source] = state.planets[source].num_ships - max(0, state.incoming_ships(source, 2) -
+                                                                  state.incoming_ships(source, 1))
+        # A planet being reinforced doesn't send ships away, and one sending ships doesn't need reinforcing.
+        if target in taken or target in senders or source in taken or ships > spare[source]:
+            continue
+        if issue_order(state, source, target, ships):
+            spare[source] -= ships
+            taken.add(target)
+            senders.add(source)
+            issued += 1
+            if issued == max_orders:
+                break
+    return issued
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+#
+"""
+    Per-turn latency benchmark. Replays recorded turn states through a bot's do_turn, offline and with its output
+    captured, and reports p50/p95/p99/max latency per map for each phase of a turn: parsing the state (parse),
+    deciding on orders (do_turn) and sending them (emit).
+
+    Turn states come from:
+      - recordings made by running a bot with PLANET_WARS_RECORD=<file> (see planet_wars.read_turns),
+      - PlayGame logs (the log.txt argument in run.py), from the "engine > player1:" lines,
+      - any map file, replayed as its first turn,
+      - synthetic stress states with thousands of planets and fleets (--stress).
+
+    Usage: python benchmark.py <bot> [--stress] [--repeat N] [turn_file ...]
+"""
+import io, os, random, sys, time, logging
+from contextlib import redirect_stdout
+
+import planet_wars
+from planet_wars import PlanetWars, read_turns
+
+
+PHASES = ('parse', 'do_turn', 'emit')
+
+
+def load_turns(path, player=1):
+    """ Returns the turn states stored in a recording, a PlayGame log or a map file. """
+    with open(path, 'rb') as turn_file:
+        data = turn_file.read()
+
+    prefix = b'engine > player%d: ' % player
+    if prefix in data:
+        # PlayGame logs every line it sends to a bot; keep the ones sent to this player.
+        data = b'\n'.join(line[len(prefix):] for line in data.split(b'\n') if line.startswith(prefix)) + b'\n'
+    elif b'\ngo\n' not in data and not data.startswith(b'go\n'):
+        # A map file: a single turn.
+        return [data]
+    return list(read_turns(io.BufferedReader(io.BytesIO(data)), record_path=''))
+
+
+def stress_turns(num_planets, num_fleets, num_turns=10, seed=0):
+    """
+        Synthetic turns with many planets and fleets in flight. Ships and fleets change from turn to turn so that
+        incremental parsing has work to do, while the planets stay put like in a real game.
+    """
+    rng = random.Random(seed)
+    size = num_planets ** 0.5 * 5
+    planets = [(rng.uniform(0, size), rng.uniform(0, size), rng.choice((0, 0, 1, 2)), rng.randint(1, 100),
+                rng.randint(1, 5)) for _ in range(num_planets)]
+
+    turns = []
+    for _ in range(num_turns):
+        lines = ['P %r %r %d %d %d' % (x, y, owner, rng.randint(1, 200), growth)
+                 for x, y, owner, ships, growth in planets]
+        for _ in range(num_fleets):
+            trip = rng.randint(1, 40)
+            lines.append('F %d %d %d %d %d %d' % (rng.randint(1, 2), rng.randint(1, 100), rng.randrange(num_planets),
+                                                  rng.randrange(num_planets), trip, rng.randint(1, trip)))
+        turns.append(('\n'.join(lines) + '\n').encode())
+    return turns
+
+
+def replay(do_turn, turns):
+    """ Plays the turns through do_turn like a bot's main loop does and returns each phase's latencies, in ms. """
+    timings = {phase: [] for phase in PHASES}
+    state = PlanetWars()
+    output = io.StringIO()
+    stdout = planet_wars.stdout
+    planet_wars.stdout = output
+    try:
+        with redirect_stdout(output):
+            for turn in turns:
+                start = time.perf_counter()
+                state.update(turn)
+                parsed = time.perf_counter()
+                do_turn(state)
+                decided = time.perf_counter()
+                planet_wars.finish_turn()
+                sent = time.perf_counter()
+
+                timings['parse'].append((parsed - start) * 1000)
+                timings['do_turn'].append((decided - parsed) * 1000)
+                timings['emit'].append((sent - decided) * 1000)
+                output.seek(0)
+                output.truncate()
+    finally:
+        planet_wars.stdout = stdout
+        planet_wars.orders.clear()
+    return timings
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else 0.0
+
+
+def report(results):
+    """ Prints p50/p95/p99/max latency per map and phase, given {map name: timings}. """
+    print('%-28s %-8s %6s %10s %10s %10s %10s' % ('map', 'phase', 'turns', 'p50 ms', 'p95 ms', 'p99 ms', 'max ms'))
+    for name, timings in results.items():
+        for phase in PHASES:
+            values = timings[phase]
+            print('%-28s %-8s %6d %10.3f %10.3f %10.3f %10.3f' % (name, phase, len(values), percentile(values, 50),
+                                                                 percentile(values, 95), percentile(values, 99),
+                                                                 max(values, default=0.0)))
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not args:
+        print('Usage: python benchmark.py <bot> [--stress] [--repeat N] [turn_file ...]')
+        sys.exit(1)
+
+    from simulator import load_bot
+    do_turn = load_bot(args.pop(0))
+    # Bot logging would otherwise be measured along with the bot.
+    logging.disable(logging.INFO)
+
+    repeat = 1
+    if '--repeat' in args:
+        index = args.index('--repeat')
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+    stress = '--stress' in args
+    paths = [arg for arg in args if arg != '--stress']
+    if not paths and not stress:
+        paths = sorted(os.path.join('maps', name) for name in os.listdir('maps') if name.endswith('.txt'))
+
+    results = {}
+    for path in paths:
+        results[os.path.basename(path)] = replay(do_turn, load_turns(path) * repeat)
+    if stress:
+        for num_planets, num_fleets in ((100, 500), (1000, 2000), (2000, 5000)):
+            name = 'stress %dp %df' % (num_planets, num_fleets)
+            results[name] = replay(do_turn, stress_turns(num_planets, num_fleets) * repeat)
+    report(results)
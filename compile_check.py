@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+"""
+    Checks that compiled behavior trees (see bt_nodes.CompiledTree) behave exactly like the trees they were compiled
+    from. Random trees of Selectors, Sequences, Budgets, Checks and Actions, some nested past MAX_COMPILE_DEPTH, are
+    run both ways over the same scripted ticks: every leaf and every look at the clock draws its result from a seeded
+    stream, so the two runs agree on the tree's result and on the sequence of calls only if the compiled tree runs the
+    same nodes in the same order.
+
+    Run it with PLANET_WARS_TRACE and PLANET_WARS_PROFILE unset; traced and profiled trees aren't compiled.
+
+    Usage: python compile_check.py [--trees N] [--ticks N] [--seed N]
+"""
+import random, sys
+
+from behavior_tree_bot.bt_nodes import Selector, Sequence, Budget, Check, Action, CompiledTree, MAX_COMPILE_DEPTH
+
+
+# Leaf results, truthy and falsy; a compiled chain passes on whatever a leaf returned, not just True or False.
+RESULTS = (True, False, None, 0, 1, 2, '', 'ok')
+
+
+class ScriptedState:
+    """ Stands in for the game state: leaves and time_left() draw from a seeded stream and log every call. """
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.calls = []
+
+    def time_left(self):
+        seconds = self.rng.choice((0.0, 0.01, 0.05, 0.1, 0.2, 1.0))
+        self.calls.append(('time_left', seconds))
+        return seconds
+
+    def leaf(self, name):
+        result = self.rng.choice(RESULTS)
+        self.calls.append((name, result))
+        return result
+
+
+def random_leaf(rng, count):
+    name = 'leaf_%d' % count
+
+    def leaf_function(state):
+        return state.leaf(name)
+    leaf_function.__name__ = name
+    if rng.random() < 0.5:
+        return Check(leaf_function)
+    return Action(leaf_function, min_time=rng.choice((0, 0, 0.05, 0.1)))
+
+
+def random_tree(rng, depth, max_depth, leaves):
+    """
+        A random tree at most max_depth levels deep; `leaves` counts the leaves made so far. Trees deeper than 8
+        levels are one long chain with leaves alongside, so that they reach max_depth without growing exponentially.
+    """
+    deep = max_depth > 8
+    if depth >= max_depth or not deep and rng.random() < 0.3:
+        leaves.append(None)
+        return random_leaf(rng, len(leaves))
+    kind = rng.choice((Selector, Sequence, Selector, Sequence, Budget))
+    # A Budget runs one of its first two children.
+    min_children, max_children = (1, 2) if kind is Budget else (0, 4)
+    if deep:
+        children = [random_tree(rng, depth + 1, max_depth, leaves)] + \
+                   [random_tree(rng, max_depth, max_depth, leaves) for _ in range(rng.randint(0, max_children - 2))]
+        rng.shuffle(children)
+    else:
+        children = [random_tree(rng, depth + 1, max_depth, leaves)
+                    for _ in range(rng.randint(min_children, max_children))]
+    if kind is Budget:
+        return Budget(children, reserve=rng.choice((0.0, 0.05, 0.1)))
+    return kind(children)
+
+
+def run(tree, seed, ticks):
+    state = ScriptedState(seed)
+    results = [bool(tree.execute(state)) for _ in range(ticks)]
+    return results, state.calls
+
+
+def check(num_trees, ticks, seed):
+    """ Compares num_trees random trees with their compiled versions; returns the first that differs, or None. """
+    rng = random.Random(seed)
+    for index in range(num_trees):
+        # Every fifth tree is deep enough for part of it to run through its nodes' own execute.
+        max_depth = rng.randint(MAX_COMPILE_DEPTH + 1, 4 * MAX_COMPILE_DEPTH) if index % 5 == 4 else rng.randint(1, 8)
+        root = random_tree(rng, 0, max_depth, [])
+        run_seed = rng.random()
+        if run(root, run_seed, ticks) != run(CompiledTree(root), run_seed, ticks):
+            return root
+    return None
+
+
+if __name__ == '__main__':
+    settings = {'trees': 2000, 'ticks': 20, 'seed': 0}
+    args = sys.argv[1:]
+    while args:
+        name = args.pop(0).lstrip('-')
+        if name not in settings or not args:
+            print(__doc__)
+            sys.exit(1)
+        settings[name] = int(args.pop(0))
+
+    if CompiledTree(Selector([])).source is None:
+        print('Tracing or profiling is on, so trees are not compiled; unset PLANET_WARS_TRACE and PLANET_WARS_PROFILE.')
+        sys.exit(1)
+    # The interpreted version of a deep tree recurses a few frames per level.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 40 * MAX_COMPILE_DEPTH))
+    mismatch = check(settings['trees'], settings['ticks'], settings['seed'])
+    if mismatch is not None:
+        print('Compiled tree differs from:\n' + mismatch.tree_to_string())
+        sys.exit(1)
+    print('%d trees, %d ticks each: compiled and interpreted trees agree' % (settings['trees'], settings['ticks']))
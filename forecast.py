@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+#
+"""
+    Forecasts who owns each planet, and with how many ships, over the next turns if nobody gives another order.
+    Fleets already in flight are played out with the game's growth and battle rules, for all planets at once.
+"""
+import numpy as np
+
+
+def project(owner, ships, growth, arrivals):
+    """
+        Plays out N independent planets. owner, ships and growth hold each planet's current values, arrivals[n, t, o]
+        the ships of owner o arriving at planet n after t turns. Returns the (N, T) owner and ships tables, where
+        column 0 is the current turn.
+    """
+    num_rows, num_turns = arrivals.shape[:2]
+    rows = np.arange(num_rows)
+    owners = np.empty((num_rows, num_turns), dtype=np.int64)
+    garrisons = np.empty((num_rows, num_turns))
+    owners[:, 0], garrisons[:, 0] = owner, ships
+
+    contested = arrivals.sum(axis=2) > 0
+    for turn in range(1, num_turns):
+        # Owned planets grow before fleets land.
+        ships = ships + np.where(owner > 0, growth, 0)
+
+        # The largest force takes the planet with what is left after fighting the second largest; on a tie the
+        # owner keeps it with no ships.
+        forces = arrivals[:, turn].copy()
+        forces[rows, owner] += ships
+        ranked = np.sort(forces, axis=1)
+        first, second = ranked[:, 2], ranked[:, 1]
+        battle = contested[:, turn]
+        owner = np.where(battle & (first > second), forces.argmax(axis=1), owner)
+        ships = np.where(battle, first - second, ships)
+
+        owners[:, turn], garrisons[:, turn] = owner, ships
+    return owners, garrisons
+
+
+class Forecast:
+    def __init__(self, state, horizon=None):
+        planets = state.planets
+        fleets = [fleet for fleet in state.fleets if fleet.turns_remaining > 0]
+        if horizon is None:
+            # Long enough for every fleet in flight, and for any order given this turn, to land.
+            horizon = max([fleet.turns_remaining for fleet in fleets] + [max(map(max, state.distances), default=0)])
+        self.horizon = horizon
+
+        self.current_owner = np.array([planet.owner for planet in planets], dtype=np.int64)
+        self.current_ships = np.array([planet.num_ships for planet in planets], dtype=float)
+        self.growth = np.array([planet.growth_rate for planet in planets], dtype=float)
+        self.distances = np.array(state.distances, dtype=np.int64).reshape(len(planets), len(planets))
+
+        self.arrivals = np.zeros((len(planets), horizon + 1, 3))
+        fleets = [fleet for fleet in fleets if fleet.turns_remaining <= horizon]
+        np.add.at(self.arrivals, ([fleet.destination_planet for fleet in fleets],
+                                  [fleet.turns_remaining for fleet in fleets],
+                                  [fleet.owner for fleet in fleets]),
+                  [fleet.num_ships for fleet in fleets])
+
+        # Planets x turns tables of owner and garrison.
+        self.owner, self.ships = project(self.current_owner, self.current_ships, self.growth, self.arrivals)
+
+    def owner_at(self, planet_ID, turns):
+        return int(self.owner[planet_ID, min(turns, self.horizon)])
+
+    def ships_at(self, planet_ID, turns):
+        ships = self.ships[planet_ID, min(turns, self.horizon)]
+        if turns > self.horizon and self.owner[planet_ID, self.horizon] > 0:
+            # No more fleets land after the horizon, so the planet just keeps growing.
+            ships += (turns - self.horizon) * self.growth[planet_ID]
+        return float(ships)
+
+    def what_if(self, source_planet_IDs, destination_planet_IDs, num_ships, player_id=1):
+        """
+            Forecasts the effect of proposed orders, each on its own against the current forecast. Only the source
+            and destination of each order are played out again. Takes scalars or equal-length sequences; returns
+            the source owner and ships tables and the destination owner and ships tables, one row per order.
+        """
+        sources = np.atleast_1d(np.asarray(source_planet_IDs, dtype=np.int64))
+        destinations = np.atleast_1d(np.asarray(destination_planet_IDs, dtype=np.int64))
+        num_ships = np.broadcast_to(np.asarray(num_ships, dtype=float), sources.shape)
+        orders = np.arange(len(sources))
+
+        source_owner, source_ships = project(self.current_owner[sources], self.current_ships[sources] - num_ships,
+                                             self.growth[sources], self.arrivals[sources])
+
+        arrivals = self.arrivals[destinations]
+        arrival_turns = self.distances[sources, destinations]
+        in_horizon = arrival_turns <= self.horizon
+        arrivals[orders[in_horizon], arrival_turns[in_horizon], player_id] += num_ships[in_horizon]
+        destination_owner, destination_ships = project(self.current_owner[destinations],
+                                                       self.current_ships[destinations],
+                                                       self.growth[destinations], arrivals)
+        return source_owner, source_ships, destination_owner, destination_ships
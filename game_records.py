@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+#
+"""
+    Game records. read_playback streams PlayGame's game output (the playback line it prints to stdout for
+    ShowGame) and yields one snapshot per turn without holding the whole game in memory. GameArchive stores many
+    games in one file as compressed, delta-encoded columns, so a query only reads and decodes the columns it uses.
+
+    Archive layout: a magic line, then one zlib-compressed blob per (game, column), then a JSON index of the games'
+    metadata and blob offsets, then the index's offset as 8 little-endian bytes. Adding games rewrites only the
+    index.
+
+    Example, the ship differential by turn across all map71 games:
+        python game_records.py games.pwa map71
+"""
+from collections import namedtuple
+import json, os, re, struct, sys, zlib
+
+import numpy as np
+
+from planet_wars import Planet, Fleet
+
+
+TurnSnapshot = namedtuple('TurnSnapshot', ['turn', 'planets', 'fleets'])
+
+_SEPARATORS = re.compile(r'([:|\n])')
+
+
+def read_playback(stream, chunk_size=1 << 16):
+    """
+        Yields a TurnSnapshot for the initial state (turn 0) and every turn after it, reading the text stream a
+        chunk at a time. Lines that are not a playback line (turn counters, results) are skipped.
+    """
+    header, planets, turn = [], None, 0
+    pending = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        pending += chunk if chunk else '\n'
+        parts = _SEPARATORS.split(pending)
+        pending = parts.pop()
+        for token, separator in zip(parts[::2], parts[1::2]):
+            if planets is None:
+                # "x,y,owner,ships,growth" per planet, up to the '|' that starts the turns.
+                header.append(token)
+                if separator == '|':
+                    planets = []
+                    for ID, fields in enumerate(header):
+                        x, y, owner, num_ships, growth_rate = fields.split(',')
+                        planets.append(Planet(ID, float(x), float(y), int(owner), int(num_ships), int(growth_rate)))
+                    yield TurnSnapshot(0, planets, [])
+                elif separator == '\n':
+                    header = []
+                continue
+
+            # "owner.ships" per planet followed by "owner.ships.source.destination.total.remaining" per fleet.
+            if token:
+                turn += 1
+                items = [item.split('.') for item in token.split(',')]
+                planets = [planet._replace(owner=int(item[0]), num_ships=int(item[1]))
+                           for planet, item in zip(planets, items)]
+                fleets = [Fleet(*map(int, item)) for item in items[len(planets):]]
+                yield TurnSnapshot(turn, planets, fleets)
+            if separator == '\n':
+                return
+        if not chunk:
+            return
+
+
+class GameArchive:
+    # Columns of a game, all one row per turn except the static planet columns. planet_ships is stored as the
+    # change since the previous turn; fleet columns hold every turn's fleets back to back, split by fleet_count.
+    FLEET_COLUMNS = ('fleet_owner', 'fleet_ships', 'fleet_source', 'fleet_destination', 'fleet_total_trip_length',
+                     'fleet_turns_remaining')
+    MAGIC = b'PWGA1\n'
+
+    def __init__(self, path):
+        """ Opens an archive for reading and adding games, creating it if it does not exist. """
+        self.path = path
+        if not os.path.exists(path):
+            with open(path, 'wb') as archive:
+                archive.write(self.MAGIC)
+                self._write_index(archive, [])
+        with open(path, 'rb') as archive:
+            assert archive.read(len(self.MAGIC)) == self.MAGIC, 'Not a game archive: ' + path
+            archive.seek(-8, os.SEEK_END)
+            self._index_offset, = struct.unpack('<Q', archive.read(8))
+            archive.seek(self._index_offset)
+            self.games = json.loads(archive.read()[:-8].decode('utf-8'))
+
+    @staticmethod
+    def _write_index(archive, games):
+        offset = archive.tell()
+        archive.write(json.dumps(games).encode('utf-8'))
+        archive.write(struct.pack('<Q', offset))
+
+    def add_game(self, snapshots, **metadata):
+        """ Appends a game, given its TurnSnapshots, with any JSON-serializable metadata (map, bots, winner...). """
+        snapshots = list(snapshots)
+        planets = snapshots[0].planets
+        fleets = [fleet for snapshot in snapshots for fleet in snapshot.fleets]
+        ships = np.array([[planet.num_ships for planet in snapshot.planets] for snapshot in snapshots],
+                         dtype=np.int32).reshape(len(snapshots), len(planets))
+
+        columns = {
+            'planet_x': np.array([planet.x for planet in planets]),
+            'planet_y': np.array([planet.y for planet in planets]),
+            'planet_growth': np.array([planet.growth_rate for planet in planets], dtype=np.int32),
+            'planet_owner': np.array([[planet.owner for planet in snapshot.planets] for snapshot in snapshots],
+                                     dtype=np.int8),
+            'planet_ships': np.diff(ships, axis=0, prepend=0),
+            'fleet_count': np.array([len(snapshot.fleets) for snapshot in snapshots], dtype=np.int32),
+        }
+        fleet_table = np.array(fleets, dtype=np.int32).reshape(len(fleets), len(Fleet._fields))
+        for name, values in zip(self.FLEET_COLUMNS, fleet_table.T):
+            columns[name] = values
+
+        with open(self.path, 'r+b') as archive:
+            archive.seek(self._index_offset)
+            blobs = {}
+            for name, values in columns.items():
+                values = np.ascontiguousarray(values)
+                blobs[name] = [archive.tell(), str(values.dtype)]
+                archive.write(zlib.compress(values.tobytes()))
+                blobs[name].append(archive.tell() - blobs[name][0])
+            self.games.append(dict(metadata, turns=len(snapshots) - 1, num_planets=len(planets), columns=blobs))
+            self._index_offset = archive.tell()
+            self._write_index(archive, self.games)
+            archive.truncate()
+
+    def column(self, game, name):
+        """ Reads and decodes one column of one game; per-turn planet columns come back as turns x planets. """
+        info = self.games[game]
+        offset, dtype, size = info['columns'][name]
+        with open(self.path, 'rb') as archive:
+            archive.seek(offset)
+            values = np.frombuffer(zlib.decompress(archive.read(size)), dtype=dtype)
+        if name in ('planet_owner', 'planet_ships'):
+            values = values.reshape(-1, info['num_planets'])
+        if name == 'planet_ships':
+            values = np.cumsum(values, axis=0, dtype=np.int64)
+        return values
+
+    def find(self, **metadata):
+        """ Indexes of the games whose metadata matches all the given values. """
+        return [index for index, game in enumerate(self.games)
+                if all(game.get(key) == value for key, value in metadata.items())]
+
+    def ship_differential(self, game):
+        """ Player 1's total ships minus player 2's, on planets and in fleets, for every turn of a game. """
+        owner, ships = self.column(game, 'planet_owner'), self.column(game, 'planet_ships')
+        differential = np.where(owner == 1, ships, 0).sum(axis=1) - np.where(owner == 2, ships, 0).sum(axis=1)
+
+        fleet_turn = np.repeat(np.arange(len(owner)), self.column(game, 'fleet_count'))
+        fleet_owner, fleet_ships = self.column(game, 'fleet_owner'), self.column(game, 'fleet_ships')
+        sign = np.where(fleet_owner == 1, 1, np.where(fleet_owner == 2, -1, 0))
+        np.add.at(differential, fleet_turn, sign * fleet_ships)
+        return differential
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python game_records.py <archive> <map name>')
+        sys.exit(1)
+
+    archive = GameArchive(sys.argv[1])
+    games = archive.find(map=sys.argv[2])
+    differentials = [archive.ship_differential(game) for game in games]
+    print(len(games), 'games on', sys.argv[2])
+    for turn in range(max(map(len, differentials), default=0)):
+        values = [differential[turn] for differential in differentials if turn < len(differential)]
+        print('turn %4d: mean %9.1f  min %7d  max %7d' % (turn, np.mean(values), min(values), max(values)))
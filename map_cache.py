@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#
+"""
+    Compiled map bundles. Each map in maps/ can be compiled once into a small binary file holding its planet
+    geometry, all-pairs distance matrix, per-planet neighbour rankings and growth-weighted centrality. Bots load a
+    bundle with mmap, so every process playing the same map shares one read-only copy and nothing is recomputed.
+
+    Bundles are named after a hash of the planets' coordinates and growth rates, which a bot can compute from its
+    first turn. Compile every map with: python map_cache.py [map_file ...]
+"""
+import hashlib, mmap, os, struct, sys
+
+
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'maps', 'compiled')
+
+MAGIC = b'PWMB'
+# magic, version, number of planets, padding to keep the arrays 8-byte aligned.
+HEADER = struct.Struct('<4sIII')
+VERSION = 1
+
+_bundles = {}
+
+
+def geometry_hash(planets):
+    """ Identifies a map by its planets' positions and growth rates, which never change during a game. """
+    packed = struct.pack('<%dd%di' % (2 * len(planets), len(planets)),
+                         *[coordinate for planet in planets for coordinate in (planet.x, planet.y)],
+                         *[int(planet.growth_rate) for planet in planets])
+    return hashlib.sha1(packed).hexdigest()
+
+
+class MapBundle:
+    """
+        Read-only views into a compiled map. distances[i][j] and neighbours[i] (the other planet IDs, nearest
+        first) are memoryview rows over the mapped file, so indexing them copies nothing.
+    """
+    def __init__(self, buffer):
+        self._buffer = buffer
+        magic, version, num_planets, _ = HEADER.unpack_from(buffer)
+        assert magic == MAGIC and version == VERSION, 'Not a version %d map bundle' % VERSION
+        self.num_planets = n = num_planets
+
+        view = memoryview(buffer)
+        offset = HEADER.size
+
+        def section(code, count):
+            nonlocal offset
+            size = struct.calcsize(code) * count
+            values = view[offset:offset + size].cast(code)
+            offset += size
+            return values
+
+        self.x, self.y, self.centrality = section('d', n), section('d', n), section('d', n)
+        self.growth = section('i', n)
+        distances, neighbours = section('i', n * n), section('i', n * (n - 1))
+        self.distances = [distances[i * n:(i + 1) * n] for i in range(n)]
+        self.neighbours = [neighbours[i * (n - 1):(i + 1) * (n - 1)] for i in range(n)]
+
+
+def compile_bundle(planets):
+    """ Returns the bundle bytes for a list of planets. """
+    from planet_wars import ceil_distance
+    n = len(planets)
+    distances = [[ceil_distance(source, destination) for destination in planets] for source in planets]
+    neighbours = [sorted((ID for ID in range(n) if ID != source_ID), key=row.__getitem__)
+                  for source_ID, row in enumerate(distances)]
+    # Growth reachable from each planet, discounted by how far away it is.
+    centrality = [sum(planet.growth_rate / distances[source_ID][ID] for ID, planet in enumerate(planets)
+                      if ID != source_ID and distances[source_ID][ID] > 0)
+                  for source_ID in range(n)]
+
+    return b''.join([HEADER.pack(MAGIC, VERSION, n, 0),
+                     struct.pack('<%dd' % n, *[planet.x for planet in planets]),
+                     struct.pack('<%dd' % n, *[planet.y for planet in planets]),
+                     struct.pack('<%dd' % n, *centrality),
+                     struct.pack('<%di' % n, *[int(planet.growth_rate) for planet in planets]),
+                     struct.pack('<%di' % (n * n), *[d for row in distances for d in row]),
+                     struct.pack('<%di' % (n * (n - 1)), *[ID for row in neighbours for ID in row])])
+
+
+def compile_map(map_path, directory=BUNDLE_DIR):
+    """ Compiles one map file into directory and returns the bundle's path. """
+    from planet_wars import PlanetWars
+    with open(map_path) as map_file:
+        planets = PlanetWars(map_file.read()).planets
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, geometry_hash(planets) + '.bin')
+    with open(path, 'wb') as bundle_file:
+        bundle_file.write(compile_bundle(planets))
+    return path
+
+
+def load_bundle(planets, directory=BUNDLE_DIR):
+    """ Maps the compiled bundle for these planets into memory, or returns None if the map was never compiled. """
+    key = geometry_hash(planets)
+    bundle = _bundles.get(key)
+    if bundle is None:
+        path = os.path.join(directory, key + '.bin')
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as bundle_file:
+            bundle = _bundles[key] = MapBundle(mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ))
+    return bundle
+
+
+if __name__ == '__main__':
+    map_paths = sys.argv[1:] or sorted(os.path.join('maps', name) for name in os.listdir('maps')
+                                       if name.endswith('.txt'))
+    for map_path in map_paths:
+        print(map_path, '->', compile_map(map_path))
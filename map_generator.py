@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+#
+"""
+    Synthetic map generator for stress and scaling runs. Writes maps in the same format as maps/, from 10 to 10,000
+    planets, with point symmetry (like maps/: each planet has a twin reflected through the centre, with players 1
+    and 2 swapped), mirror symmetry, or none. Growth rates follow a uniform, skewed (mostly slow planets) or constant
+    distribution, and fleets can be put in flight from the start. The same arguments and seed give the same map.
+
+    The map area grows with the planet count so that planets stay about as far apart as in maps/, and no two
+    planets are closer than one unit, so that every trip takes at least one turn.
+
+    Usage: python map_generator.py <num_planets> [--seed N] [--symmetry point|mirror|none]
+                                   [--growth uniform|skewed|constant] [--fleets N] [--out map_file]
+"""
+import os, random, sys
+from math import ceil, sqrt
+
+from planet_wars import Planet, Fleet, ceil_distance
+
+
+SYMMETRIES = ('point', 'mirror', 'none')
+GROWTHS = ('uniform', 'skewed', 'constant')
+HOME_SHIPS, HOME_GROWTH = 100, 5
+MIN_SEPARATION = 1.0
+
+
+def _growth_rate(rng, growth):
+    if growth == 'uniform':
+        return rng.randint(1, 5)
+    elif growth == 'skewed':
+        return min(5, 1 + int(rng.expovariate(1.0)))
+    return 3
+
+
+class _Placer:
+    """ Random positions in a square, at least MIN_SEPARATION apart, checked against a grid of placed points. """
+    def __init__(self, rng, size):
+        self.rng, self.size = rng, size
+        self.cells = {}
+
+    def free(self, x, y):
+        cx, cy = int(x // MIN_SEPARATION), int(y // MIN_SEPARATION)
+        return all((px - x) ** 2 + (py - y) ** 2 >= MIN_SEPARATION ** 2
+                   for i in (cx - 1, cx, cx + 1) for j in (cy - 1, cy, cy + 1) for px, py in self.cells.get((i, j), ()))
+
+    def add(self, x, y):
+        self.cells.setdefault((int(x // MIN_SEPARATION), int(y // MIN_SEPARATION)), []).append((x, y))
+
+    def place(self, reflect=lambda x, y: (x, y), x=None):
+        """ Takes a free position, at x if given, and its reflection, if that is free and far enough from it. """
+        while True:
+            px = self.rng.uniform(0, self.size) if x is None else x
+            point = (round(px, 6), round(self.rng.uniform(0, self.size), 6))
+            twin = reflect(*point)
+            if not self.free(*point) or not self.free(*twin):
+                continue
+            if twin != point and (point[0] - twin[0]) ** 2 + (point[1] - twin[1]) ** 2 < MIN_SEPARATION ** 2:
+                continue
+            self.add(*point)
+            if twin != point:
+                self.add(*twin)
+            return point, twin
+
+
+def generate_map(num_planets, seed=0, symmetry='point', growth='uniform', num_fleets=0, max_ships=100):
+    """ Returns the planets and fleets of a new map. """
+    assert num_planets >= 2 and symmetry in SYMMETRIES and growth in GROWTHS
+    rng = random.Random(seed)
+    # A whole size keeps the centre, and so every reflection, exact.
+    size = float(ceil(5 * sqrt(num_planets)))
+    centre = size / 2
+    if symmetry == 'point':
+        reflect = lambda x, y: (round(2 * centre - x, 6), round(2 * centre - y, 6))
+    elif symmetry == 'mirror':
+        reflect = lambda x, y: (round(2 * centre - x, 6), y)
+    else:
+        reflect = None
+    placer = _Placer(rng, size)
+
+    planets = []
+    if reflect is None:
+        # Two homes, then independent neutral planets.
+        for owner in (1, 2):
+            (x, y), _ = placer.place()
+            planets.append(Planet(len(planets), x, y, owner, HOME_SHIPS, HOME_GROWTH))
+        while len(planets) < num_planets:
+            (x, y), _ = placer.place()
+            planets.append(Planet(len(planets), x, y, 0, rng.randint(1, max_ships), _growth_rate(rng, growth)))
+        twins = None
+    else:
+        # As in maps/: an odd planet count starts with one planet on the centre (or axis), then twin pairs, the
+        # first of them the two homes.
+        if num_planets % 2 and symmetry == 'point':
+            x, y = centre, centre
+            placer.add(x, y)
+            planets.append(Planet(0, x, y, 0, rng.randint(1, max_ships), _growth_rate(rng, growth)))
+        elif num_planets % 2:
+            (x, y), _ = placer.place(reflect, x=centre)
+            planets.append(Planet(0, x, y, 0, rng.randint(1, max_ships), _growth_rate(rng, growth)))
+        while len(planets) < num_planets:
+            home = len(planets) == num_planets % 2
+            (x, y), (twin_x, twin_y) = placer.place(reflect)
+            ships = HOME_SHIPS if home else rng.randint(1, max_ships)
+            growth_rate = HOME_GROWTH if home else _growth_rate(rng, growth)
+            planets.append(Planet(len(planets), x, y, 1 if home else 0, ships, growth_rate))
+            planets.append(Planet(len(planets), twin_x, twin_y, 2 if home else 0, ships, growth_rate))
+        # Each planet's twin, to mirror the fleets.
+        twins = list(range(len(planets)))
+        for ID in range(num_planets % 2, num_planets, 2):
+            twins[ID], twins[ID + 1] = ID + 1, ID
+
+    fleets = []
+    while len(fleets) < num_fleets:
+        source, destination = rng.sample(range(num_planets), 2)
+        trip = ceil_distance(planets[source], planets[destination])
+        owner, ships, turns_remaining = rng.randint(1, 2), rng.randint(1, max_ships), rng.randint(1, trip)
+        fleets.append(Fleet(owner, ships, source, destination, trip, turns_remaining))
+        if twins is not None and len(fleets) < num_fleets:
+            fleets.append(Fleet(3 - owner, ships, twins[source], twins[destination], trip, turns_remaining))
+    return planets, fleets
+
+
+def map_text(planets, fleets=()):
+    lines = ['P %r %r %d %d %d' % (planet.x, planet.y, planet.owner, planet.num_ships, planet.growth_rate)
+             for planet in planets]
+    lines += ['F %d %d %d %d %d %d' % tuple(fleet) for fleet in fleets]
+    return '\n'.join(lines) + '\n'
+
+
+def write_map(path, num_planets, **settings):
+    """ Generates a map and writes it to path. """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as map_file:
+        map_file.write(map_text(*generate_map(num_planets, **settings)))
+    return path
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or not sys.argv[1].isdigit():
+        print(__doc__)
+        sys.exit(1)
+
+    num_planets = int(sys.argv[1])
+    settings = {'seed': 0, 'symmetry': 'point', 'growth': 'uniform', 'fleets': 0, 'out': None}
+    args = sys.argv[2:]
+    while args:
+        name = args.pop(0).lstrip('-')
+        if name not in settings or not args:
+            print(__doc__)
+            sys.exit(1)
+        value = args.pop(0)
+        settings[name] = int(value) if isinstance(settings[name], int) else value
+
+    out = settings.pop('out') or os.path.join('maps', 'generated', 'map_%d_%s_%s_%d.txt' % (
+        num_planets, settings['symmetry'], settings['growth'], settings['seed']))
+    print(write_map(out, num_planets, num_fleets=settings.pop('fleets'), **settings))
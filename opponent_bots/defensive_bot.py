@@ -1,80 +1,13 @@
 #!/usr/bin/env python
 #
 import logging, traceback, sys, os, inspect
-logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
 
-from planet_wars import PlanetWars, issue_order, finish_turn
-
-
-def spread(state):
-    my_planets = iter(sorted(state.my_planets(), key=lambda p: p.num_ships))
-
-    neutral_planets = [planet for planet in state.neutral_planets()
-                       if not any(fleet.destination_planet == planet.ID for fleet in state.my_fleets())]
-    neutral_planets.sort(key=lambda p: p.num_ships)
-
-    target_planets = iter(neutral_planets)
-
-    try:
-        my_planet = next(my_planets)
-        target_planet = next(target_planets)
-        while True:
-            required_ships = target_planet.num_ships + 1
-
-            if my_planet.num_ships > required_ships:
-                issue_order(state, my_planet.ID, target_planet.ID, required_ships)
-                my_planet = next(my_planets)
-                target_planet = next(target_planets)
-            else:
-                my_planet = next(my_planets)
-
-    except StopIteration:
-        return
-
-
-def defend(state):
-    my_planets = [planet for planet in state.my_planets()]
-    if not my_planets:
-        return
-
-    def strength(p):
-        return p.num_ships \
-               + sum(fleet.num_ships for fleet in state.my_fleets() if fleet.destination_planet == p.ID) \
-               - sum(fleet.num_ships for fleet in state.enemy_fleets() if fleet.destination_planet == p.ID)
-
-    avg = sum(strength(planet) for planet in my_planets) / len(my_planets)
-
-    weak_planets = [planet for planet in my_planets if strength(planet) < avg]
-    strong_planets = [planet for planet in my_planets if strength(planet) > avg]
-
-    if (not weak_planets) or (not strong_planets):
-        return
-
-    weak_planets = iter(sorted(weak_planets, key=strength))
-    strong_planets = iter(sorted(strong_planets, key=strength, reverse=True))
-
-    try:
-        weak_planet = next(weak_planets)
-        strong_planet = next(strong_planets)
-        while True:
-            need = int(avg - strength(weak_planet))
-            have = int(strength(strong_planet) - avg)
-
-            if have >= need > 0:
-                issue_order(state, strong_planet.ID, weak_planet.ID, need)
-                weak_planet = next(weak_planets)
-            elif have > 0:
-                issue_order(state, strong_planet.ID, weak_planet.ID, have)
-                strong_planet = next(strong_planets)
-            else:
-                strong_planet = next(strong_planets)
-
-    except StopIteration:
-        return
+from planet_wars import PlanetWars, finish_turn, read_turns
+from targeting import spread, defend
 
 
 def do_turn(state):
@@ -86,16 +19,11 @@ if __name__ == '__main__':
     logging.basicConfig(filename=__file__[:-3] + '.log', filemode='w', level=logging.DEBUG)
 
     try:
-        map_data = ''
-        while True:
-            current_line = input()
-            if len(current_line) >= 2 and current_line.startswith("go"):
-                planet_wars = PlanetWars(map_data)
-                do_turn(planet_wars)
-                finish_turn()
-                map_data = ''
-            else:
-                map_data += current_line + '\n'
+        planet_wars = PlanetWars()
+        for map_data in read_turns():
+            planet_wars.update(map_data)
+            do_turn(planet_wars)
+            finish_turn()
 
     except KeyboardInterrupt:
         print('ctrl-c, leaving ...')
@@ -1,12 +1,11 @@
 #!/usr/bin/env python
 #
 import logging, traceback, sys, os, inspect
-logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-from planet_wars import PlanetWars, issue_order, finish_turn
+from planet_wars import PlanetWars, issue_order, finish_turn, read_turns
 
 
 def do_turn(state):
@@ -32,16 +31,11 @@ if __name__ == '__main__':
     logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 
     try:
-        map_data = ''
-        while True:
-            current_line = input()
-            if len(current_line) >= 2 and current_line.startswith("go"):
-                planet_wars = PlanetWars(map_data)
-                do_turn(planet_wars)
-                finish_turn()
-                map_data = ''
-            else:
-                map_data += current_line + '\n'
+        planet_wars = PlanetWars()
+        for map_data in read_turns():
+            planet_wars.update(map_data)
+            do_turn(planet_wars)
+            finish_turn()
 
     except KeyboardInterrupt:
         print('ctrl-c, leaving ...')
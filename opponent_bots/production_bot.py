@@ -1,56 +1,27 @@
 #!/usr/bin/env python
 #
 import logging, traceback, sys, os, inspect
-logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-from planet_wars import PlanetWars, issue_order, finish_turn
+from planet_wars import PlanetWars, finish_turn, read_turns
+from targeting import produce
 
 
 def do_turn(state):
-    my_planets = iter(sorted(state.my_planets(), key=lambda p: p.num_ships, reverse=True))
-
-    target_planets = [planet for planet in state.not_my_planets()
-                      if not any(fleet.destination_planet == planet.ID for fleet in state.my_fleets())]
-    target_planets = iter(sorted(target_planets, key=lambda p: p.num_ships, reverse=True))
-
-    try:
-        my_planet = next(my_planets)
-        target_planet = next(target_planets)
-        while True:
-            if target_planet.owner == 0:
-                required_ships = target_planet.num_ships + 1
-            else:
-                required_ships = target_planet.num_ships + \
-                                 state.distance(my_planet.ID, target_planet.ID) * target_planet.growth_rate + 1
-
-            if my_planet.num_ships > required_ships:
-                issue_order(state, my_planet.ID, target_planet.ID, required_ships)
-                my_planet = next(my_planets)
-                target_planet = next(target_planets)
-            else:
-                target_planet = next(target_planets)
-
-    except StopIteration:
-        return
+    produce(state)
 
 
 if __name__ == '__main__':
     logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 
     try:
-        map_data = ''
-        while True:
-            current_line = input()
-            if len(current_line) >= 2 and current_line.startswith("go"):
-                planet_wars = PlanetWars(map_data)
-                do_turn(planet_wars)
-                finish_turn()
-                map_data = ''
-            else:
-                map_data += current_line + '\n'
+        planet_wars = PlanetWars()
+        for map_data in read_turns():
+            planet_wars.update(map_data)
+            do_turn(planet_wars)
+            finish_turn()
 
     except KeyboardInterrupt:
         print('ctrl-c, leaving ...')
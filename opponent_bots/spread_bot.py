@@ -1,65 +1,12 @@
 #!/usr/bin/env python
 #
 import logging, traceback, sys, os, inspect
-logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 currentdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 parentdir = os.path.dirname(currentdir)
 sys.path.append(parentdir)
 
-from planet_wars import PlanetWars, issue_order, finish_turn
-
-
-def spread(state):
-    my_planets = iter(sorted(state.my_planets(), key=lambda p: p.num_ships))
-
-    neutral_planets = [planet for planet in state.neutral_planets()
-                      if not any(fleet.destination_planet == planet.ID for fleet in state.my_fleets())]
-    neutral_planets.sort(key=lambda p: p.num_ships)
-
-    target_planets = iter(neutral_planets)
-
-    try:
-        my_planet = next(my_planets)
-        target_planet = next(target_planets)
-        while True:
-            required_ships = target_planet.num_ships + 1
-
-            if my_planet.num_ships > required_ships:
-                issue_order(state, my_planet.ID, target_planet.ID, required_ships)
-                my_planet = next(my_planets)
-                target_planet = next(target_planets)
-            else:
-                my_planet = next(my_planets)
-
-    except StopIteration:
-        return
-
-
-def attack(state):
-    my_planets = iter(sorted(state.my_planets(), key=lambda p: p.num_ships))
-
-    enemy_planets = [planet for planet in state.enemy_planets()
-                      if not any(fleet.destination_planet == planet.ID for fleet in state.my_fleets())]
-    enemy_planets.sort(key=lambda p: p.num_ships)
-
-    target_planets = iter(enemy_planets)
-
-    try:
-        my_planet = next(my_planets)
-        target_planet = next(target_planets)
-        while True:
-            required_ships = target_planet.num_ships + \
-                                 state.distance(my_planet.ID, target_planet.ID) * target_planet.growth_rate + 1
-
-            if my_planet.num_ships > required_ships:
-                issue_order(state, my_planet.ID, target_planet.ID, required_ships)
-                my_planet = next(my_planets)
-                target_planet = next(target_planets)
-            else:
-                my_planet = next(my_planets)
-
-    except StopIteration:
-        return
+from planet_wars import PlanetWars, finish_turn, read_turns
+from targeting import spread, attack
 
 
 def do_turn(state):
@@ -71,16 +18,11 @@ if __name__ == '__main__':
     logging.basicConfig(filename=__file__[:-3] +'.log', filemode='w', level=logging.DEBUG)
 
     try:
-        map_data = ''
-        while True:
-            current_line = input()
-            if len(current_line) >= 2 and current_line.startswith("go"):
-                planet_wars = PlanetWars(map_data)
-                do_turn(planet_wars)
-                finish_turn()
-                map_data = ''
-            else:
-                map_data += current_line + '\n'
+        planet_wars = PlanetWars()
+        for map_data in read_turns():
+            planet_wars.update(map_data)
+            do_turn(planet_wars)
+            finish_turn()
 
     except KeyboardInterrupt:
         print('ctrl-c, leaving ...')
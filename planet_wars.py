@@ -2,35 +2,93 @@
 #
 
 from math import ceil, sqrt
-from collections import namedtuple
+from collections import namedtuple, defaultdict
+from bisect import insort
+from heapq import merge
+from itertools import accumulate
 from sys import stdout
-import logging
+import os, sys
+from time import perf_counter
+
+import map_cache, spatial
+import tracing, profiling
+
+try:
+    import numpy as np
+except ImportError:
+    # Only ArrayPlanetWars needs NumPy; bots using PlanetWars run without it.
+    np = None
+
+
+class OrderBuffer:
+    """
+        Collects the turn's orders so that finish_turn can send them, and "go", in a single write. Optionally merges
+        orders with the same source and destination into one, and rounds ship counts down to whole ships (the game
+        only takes integers, and sending 50.5 ships really sends 50).
+    """
+    def __init__(self, merge_duplicates=False, round_ships=True):
+        self.merge_duplicates = merge_duplicates
+        self.round_ships = round_ships
+        self.orders = []
+        self._by_route = {}
+
+    def add(self, source_planet_ID, destination_planet_ID, num_ships):
+        if self.merge_duplicates:
+            order = self._by_route.get((source_planet_ID, destination_planet_ID))
+            if order is not None:
+                order[2] += num_ships
+                return
+            order = self._by_route[(source_planet_ID, destination_planet_ID)] = \
+                [source_planet_ID, destination_planet_ID, num_ships]
+        else:
+            order = [source_planet_ID, destination_planet_ID, num_ships]
+        self.orders.append(order)
+
+    def clear(self):
+        self.orders = []
+        self._by_route = {}
+
+    def write(self, out):
+        out.write(''.join("%d %d %d\n" % tuple(order) for order in self.orders) + "go\n")
+        out.flush()
+        self.clear()
+
+
+orders = OrderBuffer()
 
 
 def issue_order(state, source_planet_ID, destination_planet_ID, fleet_num_ships):
-    # Check for legal order
-    planet = state.planets[source_planet_ID]
-    if planet.num_ships < fleet_num_ships or planet.owner != 1:
-        logging.debug("Bad order:" + ' '.join([str(source_planet_ID), str(planet.num_ships), str(fleet_num_ships)]))
+    if orders.round_ships:
+        fleet_num_ships = int(fleet_num_ships)
+
+    # Check for legal order, with both IDs in range before indexing: a negative one would count from the end.
+    num_planets = len(state.planets)
+    planet = state.planets[source_planet_ID] if 0 <= source_planet_ID < num_planets else None
+    if planet is None or planet.num_ships < fleet_num_ships or fleet_num_ships < 0 or planet.owner != 1 or \
+            not 0 <= destination_planet_ID < num_planets or source_planet_ID == destination_planet_ID:
+        if tracing.enabled:
+            tracing.record(tracing.BAD_ORDER, source_planet_ID, destination_planet_ID, fleet_num_ships)
         return False
 
     # Update state
     distance = state.distance(source_planet_ID, destination_planet_ID)
-    state.fleets.append(Fleet(1, fleet_num_ships, source_planet_ID, destination_planet_ID, distance, distance))
-    state.planets[source_planet_ID] = planet._replace(num_ships =planet.num_ships - fleet_num_ships)
+    state._add_fleet(Fleet(1, fleet_num_ships, source_planet_ID, destination_planet_ID, distance, distance))
+    state._set_planet(planet._replace(num_ships =planet.num_ships - fleet_num_ships))
+    # The planet no longer matches its line from the game, so it is re-parsed next turn.
+    state._planet_lines[source_planet_ID] = None
 
-    # Send order
-    logging.debug("Order:" + ' '.join([str(source_planet_ID), str(destination_planet_ID), str(fleet_num_ships)]))
-    stdout.write("%d %d %d\n" % (source_planet_ID, destination_planet_ID, fleet_num_ships))
-    stdout.flush()
+    # Queue order; it is sent with the rest of the turn by finish_turn.
+    if tracing.enabled:
+        tracing.record(tracing.ORDER, source_planet_ID, destination_planet_ID, fleet_num_ships)
+    orders.add(source_planet_ID, destination_planet_ID, fleet_num_ships)
     return True
 
 
 def finish_turn():
     # Must pass "go" to game.
-    logging.debug('Finish turn\n')
-    stdout.write("go\n")
-    stdout.flush()
+    if tracing.enabled:
+        tracing.record(tracing.TURN)
+    orders.write(stdout)
 
 
 Fleet = namedtuple('Fleet', ['owner', 'num_ships', 'source_planet', 'destination_planet', 'total_trip_length',
@@ -39,29 +97,212 @@ Fleet = namedtuple('Fleet', ['owner', 'num_ships', 'source_planet', 'destination
 Planet = namedtuple('Planet', ['ID', 'x', 'y', 'owner', 'num_ships', 'growth_rate'])
 
 
+# Planets never move during a game, so distances are computed once per map and shared by every turn of the
+# bot process. Keyed by planet coordinates so that a process playing several maps keeps them apart.
+_distance_tables = {}
+# Maps with more planets than this get their distance rows computed as they are first needed, rather than all on
+# the first turn, which takes seconds for thousands of planets.
+LAZY_DISTANCES_ABOVE = 500
+
+
+def ceil_distance(source, destination):
+    """ Turns a fleet takes between two planets (or anything with x and y): their distance, rounded up. """
+    dx, dy = source.x - destination.x, source.y - destination.y
+    return int(ceil(sqrt(dx * dx + dy * dy)))
+
+
+class LazyRows:
+    """ A read-only list of per-planet rows, each computed by row(planet_ID) the first time it is asked for. """
+    def __init__(self, num_rows, row):
+        self._rows = [None] * num_rows
+        self._row = row
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, planet_ID):
+        row = self._rows[planet_ID]
+        if row is None:
+            row = self._rows[planet_ID] = self._row(planet_ID)
+        return row
+
+    def __iter__(self):
+        return (self[planet_ID] for planet_ID in range(len(self._rows)))
+
+
+def distance_table(planets):
+    """
+        Returns the all-pairs distance matrix and, per planet, the other planet IDs sorted nearest first. Neighbour
+        lists are only sorted when first asked for, and so are distance rows on maps of more than
+        LAZY_DISTANCES_ABOVE planets.
+    """
+    key = tuple((planet.x, planet.y) for planet in planets)
+    table = _distance_tables.get(key)
+    if table is None and planets:
+        # A map compiled by map_cache.py is mapped in read-only rather than recomputed.
+        bundle = map_cache.load_bundle(planets)
+        if bundle is not None:
+            table = _distance_tables[key] = (bundle.distances, bundle.neighbours)
+    if table is None:
+        def distance_row(source_ID):
+            source = planets[source_ID]
+            return [ceil_distance(source, destination) for destination in planets]
+
+        if len(planets) > LAZY_DISTANCES_ABOVE:
+            distances = LazyRows(len(planets), distance_row)
+        else:
+            distances = [distance_row(source_ID) for source_ID in range(len(planets))]
+        neighbours = LazyRows(len(planets), lambda source_ID: sorted(
+            (planet_ID for planet_ID in range(len(planets)) if planet_ID != source_ID),
+            key=distances[source_ID].__getitem__))
+        table = _distance_tables[key] = (distances, neighbours)
+    return table
+
+
+class Blackboard:
+    """
+        Memo of derived queries for one tick. Each entry is tagged with what it was computed from, either
+        ('planets', owner) or ('fleets', owner), and is dropped as soon as a planet or fleet of that owner changes.
+    """
+    def __init__(self):
+        self._values = {}
+        self._dependents = defaultdict(set)
+
+    def get(self, key, compute, depends_on=()):
+        """ Returns the memoized value for key, calling compute() for it first if needed. """
+        try:
+            return self._values[key]
+        except KeyError:
+            value = self._values[key] = compute()
+            for tag in depends_on:
+                self._dependents[tag].add(key)
+            return value
+
+    def invalidate(self, tag):
+        for key in self._dependents.pop(tag, ()):
+            self._values.pop(key, None)
+
+    def clear(self):
+        self._values.clear()
+        self._dependents.clear()
+
+
 class PlanetWars:
-    def __init__(self, game_state):
+    def __init__(self, game_state=''):
         self.planets = []
         self.fleets = []
+        self.distances, self._neighbours = [], []
+        # k-d tree over the planets' coordinates, built on first use.
+        self._spatial_index = None
+        # Text of each planet's line on the last turn, or None when the planet has to be re-parsed.
+        self._planet_lines = []
+        # Per-owner indexes (planet IDs in ID order, fleets in arrival order) and running totals.
+        self._planet_IDs = defaultdict(list)
+        self._owner_fleets = defaultdict(list)
+        self._planet_ships = defaultdict(int)
+        self._fleet_ships = defaultdict(int)
+        self._growth = defaultdict(int)
+        # Incoming fleets per (destination, owner): number of fleets, total ships, and ships per turns_remaining,
+        # with running sums of the latter built on first use.
+        self._arrival_counts = defaultdict(int)
+        self._arrival_totals = defaultdict(int)
+        self._arrival_timelines = defaultdict(list)
+        self._arrivals_by_turn = {}
+        # perf_counter() time by which the turn's orders must be sent, if the bot has a time limit.
+        self.deadline = None
+        self.blackboard = Blackboard()
+        self.update(game_state)
+
+    def update(self, game_state):
+        """
+            Brings the state up to date with a new turn's game state (text or bytes), re-parsing only the planets
+            whose line changed.
+        """
+        self.blackboard.clear()
         parse_game_state(self, game_state)
 
+    def _reset_planets(self, num_planets):
+        self.planets = [None] * num_planets
+        self._planet_lines = [None] * num_planets
+        self._planet_IDs.clear()
+        self._planet_ships.clear()
+        self._growth.clear()
+
+    def _set_planet(self, planet):
+        old = self.planets[planet.ID]
+        if old is None:
+            insort(self._planet_IDs[planet.owner], planet.ID)
+        else:
+            self._planet_ships[old.owner] -= old.num_ships
+            self._growth[old.owner] -= old.growth_rate
+            if old.owner != planet.owner:
+                self._planet_IDs[old.owner].remove(planet.ID)
+                insort(self._planet_IDs[planet.owner], planet.ID)
+        self._planet_ships[planet.owner] += planet.num_ships
+        self._growth[planet.owner] += planet.growth_rate
+        self.planets[planet.ID] = planet
+        if old is not None:
+            self.blackboard.invalidate(('planets', old.owner))
+        self.blackboard.invalidate(('planets', planet.owner))
+
+    def _reset_fleets(self):
+        self.fleets = []
+        self._owner_fleets.clear()
+        self._fleet_ships.clear()
+        self._arrival_counts.clear()
+        self._arrival_totals.clear()
+        self._arrival_timelines.clear()
+        self._arrivals_by_turn.clear()
+
+    def _add_fleet(self, fleet):
+        self.fleets.append(fleet)
+        self._owner_fleets[fleet.owner].append(fleet)
+        self._fleet_ships[fleet.owner] += fleet.num_ships
+
+        key = (fleet.destination_planet, fleet.owner)
+        timeline = self._arrival_timelines[key]
+        if len(timeline) <= fleet.turns_remaining:
+            timeline.extend([0] * (fleet.turns_remaining + 1 - len(timeline)))
+        timeline[fleet.turns_remaining] += fleet.num_ships
+        self._arrival_counts[key] += 1
+        self._arrival_totals[key] += fleet.num_ships
+        self._arrivals_by_turn.pop(key, None)
+        self.blackboard.invalidate(('fleets', fleet.owner))
+
+    def _owned_planets(self, *owners):
+        # Memoized per tick; callers get their own copy of the list.
+        return list(self.blackboard.get(('owned planets',) + owners,
+                                        lambda: [self.planets[planet_ID]
+                                                 for planet_ID in merge(*(self._planet_IDs[owner] for owner in owners))],
+                                        [('planets', owner) for owner in owners]))
+
     def my_planets(self):
-        return [planet for planet in self.planets if planet.owner == 1]
+        return self._owned_planets(1)
 
     def neutral_planets(self):
-        return [planet for planet in self.planets if planet.owner == 0]
+        return self._owned_planets(0)
 
     def enemy_planets(self):
-        return [planet for planet in self.planets if planet.owner == 2]
+        return self._owned_planets(2)
 
     def not_my_planets(self):
-        return [planet for planet in self.planets if planet.owner != 1]
+        return self._owned_planets(0, 2)
 
     def my_fleets(self):
-        return [fleet for fleet in self.fleets if fleet.owner == 1]
+        return list(self._owner_fleets[1])
 
     def enemy_fleets(self):
-        return [fleet for fleet in self.fleets if fleet.owner == 2]
+        return list(self._owner_fleets[2])
+
+    def total_ships(self, player_id):
+        """ Ships on the player's planets plus ships in the player's fleets. """
+        return self._planet_ships[player_id] + self._fleet_ships[player_id]
+
+    def total_growth(self, player_id):
+        return self._growth[player_id]
+
+    def num_fleets(self, player_id):
+        return len(self._owner_fleets[player_id])
 
     def __str__(self):
         s = ''
@@ -75,35 +316,265 @@ class PlanetWars:
         return s
 
     def distance(self, source_planet, destination_planet):
-        source = self.planets[source_planet]
-        destination = self.planets[destination_planet]
-        dx = source.x - destination.x
-        dy = source.y - destination.y
-        return int(ceil(sqrt(dx * dx + dy * dy)))
+        return self.distances[source_planet][destination_planet]
+
+    def neighbours(self, planet_ID):
+        """ IDs of all other planets, nearest first. """
+        return self._neighbours[planet_ID]
+
+    def spatial_index(self):
+        """ A spatial.KDTree over the planets' coordinates, for queries around any point. """
+        if self._spatial_index is None:
+            self._spatial_index = spatial.KDTree((planet.x, planet.y) for planet in self.planets)
+        return self._spatial_index
+
+    def nearest_planets(self, planet_ID, k=1, owner=None):
+        """ The k other planets nearest to the given one, nearest first, optionally only those of one owner. """
+        planets, source = self.planets, self.planets[planet_ID]
+        if owner is None:
+            IDs = self.spatial_index().nearest(source.x, source.y, k, planet_ID.__ne__)
+        elif len(self._planet_IDs[owner]) * 4 < len(planets):
+            # Few enough planets that checking each of them beats a filtered search of the whole map.
+            IDs = sorted((ID for ID in self._planet_IDs[owner] if ID != planet_ID),
+                         key=lambda ID: ((planets[ID].x - source.x) ** 2 + (planets[ID].y - source.y) ** 2, ID))[:k]
+        else:
+            IDs = self.spatial_index().nearest(source.x, source.y, k,
+                                               lambda ID: ID != planet_ID and planets[ID].owner == owner)
+        return [planets[ID] for ID in IDs]
+
+    def nearest_owned(self, planet_ID, owner):
+        """ The planet of the owner nearest to the given one (not counting it), or None. """
+        nearest = self.nearest_planets(planet_ID, 1, owner)
+        return nearest[0] if nearest else None
+
+    def planets_within(self, planet_ID, turns):
+        """ The other planets a fleet from the given one reaches in at most `turns` turns, in ID order. """
+        source = self.planets[planet_ID]
+        return [self.planets[ID] for ID in self.spatial_index().within(source.x, source.y, turns) if ID != planet_ID]
+
+    def has_incoming(self, planet_ID, player_id):
+        """ Whether any fleet of the player is headed to the planet. """
+        return self._arrival_counts.get((planet_ID, player_id), 0) > 0
+
+    def incoming_ships(self, planet_ID, player_id, turns=None):
+        """ Ships of the player arriving at the planet within the given number of turns (or at all). """
+        key = (planet_ID, player_id)
+        if turns is None:
+            return self._arrival_totals.get(key, 0)
+
+        by_turn = self._arrivals_by_turn.get(key)
+        if by_turn is None:
+            by_turn = self._arrivals_by_turn[key] = list(accumulate(self._arrival_timelines.get(key, ())))
+        if turns < 0 or not by_turn:
+            return 0
+        return by_turn[min(turns, len(by_turn) - 1)]
+
+    def arrivals(self, planet_ID, player_id):
+        """ Ships of the player arriving at the planet, indexed by turns_remaining. """
+        return self._arrival_timelines.get((planet_ID, player_id), [])
+
+    def time_left(self):
+        """ Seconds left until the turn's deadline, or infinity when there is none. """
+        return self.deadline - perf_counter() if self.deadline is not None else float('inf')
 
     def is_alive(self, player_id):
-        return any(planet.owner == player_id for planet in self.planets) or \
-                any(fleet.owner == player_id for fleet in self.fleets)
+        return bool(self._planet_IDs[player_id]) or bool(self._owner_fleets[player_id])
+
+
+class ArrayPlanetWars(PlanetWars):
+    """
+        PlanetWars that also keeps planets and fleets as NumPy columns, so behaviors can use vectorized masks and
+        reductions, e.g. state.planet_ships[state.planet_owner == 1].sum(). The columns are kept in step with every
+        turn update and every issue_order; all PlanetWars queries keep working unchanged. Requires NumPy.
+    """
+    FLEET_COLUMNS = ('owner', 'num_ships', 'source_planet', 'destination_planet', 'total_trip_length',
+                     'turns_remaining')
+
+    def __init__(self, game_state=''):
+        if np is None:
+            raise ImportError('ArrayPlanetWars requires NumPy')
+        self._allocate_planets(0)
+        # One row per fleet column, so each column is a contiguous slice. Grows by doubling.
+        self._fleet_table = np.zeros((len(self.FLEET_COLUMNS), 16))
+        self._num_fleet_rows = 0
+        self._distance_array, self._distance_source = None, None
+        super().__init__(game_state)
+
+    def _allocate_planets(self, num_planets):
+        self.planet_x = np.zeros(num_planets)
+        self.planet_y = np.zeros(num_planets)
+        self.planet_owner = np.zeros(num_planets, dtype=np.int64)
+        self.planet_ships = np.zeros(num_planets)
+        self.planet_growth = np.zeros(num_planets)
+
+    def _reset_planets(self, num_planets):
+        super()._reset_planets(num_planets)
+        self._allocate_planets(num_planets)
+
+    def _set_planet(self, planet):
+        super()._set_planet(planet)
+        ID = planet.ID
+        self.planet_x[ID], self.planet_y[ID] = planet.x, planet.y
+        self.planet_owner[ID], self.planet_ships[ID], self.planet_growth[ID] = \
+            planet.owner, planet.num_ships, planet.growth_rate
+
+    def _reset_fleets(self):
+        super()._reset_fleets()
+        self._num_fleet_rows = 0
+
+    def _add_fleet(self, fleet):
+        super()._add_fleet(fleet)
+        if self._num_fleet_rows == self._fleet_table.shape[1]:
+            self._fleet_table = np.concatenate([self._fleet_table, np.zeros_like(self._fleet_table)], axis=1)
+        self._fleet_table[:, self._num_fleet_rows] = fleet
+        self._num_fleet_rows += 1
+
+    def fleet_column(self, name):
+        """ View of one fleet column (see FLEET_COLUMNS) over the fleets in flight. """
+        return self._fleet_table[self.FLEET_COLUMNS.index(name), :self._num_fleet_rows]
+
+    @property
+    def fleet_owner(self):
+        return self.fleet_column('owner')
+
+    @property
+    def fleet_ships(self):
+        return self.fleet_column('num_ships')
+
+    @property
+    def fleet_source(self):
+        return self.fleet_column('source_planet')
+
+    @property
+    def fleet_destination(self):
+        return self.fleet_column('destination_planet')
+
+    @property
+    def fleet_turns_remaining(self):
+        return self.fleet_column('turns_remaining')
+
+    @property
+    def distance_array(self):
+        """ The distance matrix as a NumPy array, rebuilt only when the map changes. """
+        if self._distance_source is not self.distances:
+            num_planets = len(self.distances)
+            self._distance_array = np.array(self.distances, dtype=np.int64).reshape(num_planets, num_planets)
+            self._distance_source = self.distances
+        return self._distance_array
+
+
+def read_turns(stream=None, record_path=None, latency_path=None):
+    """
+        Yields each turn's game state, as bytes, from the game's input (stdin by default). Input is read in bulk,
+        as much as is available at a time, instead of line by line. Returns at the end of input.
+
+        If record_path, or else the PLANET_WARS_RECORD environment variable, names a file, every turn is also
+        appended to it in the game's own format so that it can be replayed later (see benchmark.py). If
+        latency_path, or else PLANET_WARS_LATENCY, names a file, the milliseconds the bot took over each turn (from
+        handing it the turn until it asks for the next one) are appended to it, one per line (see results_store.py).
+        A {bot} in the name stands for the bot's script name, so that both bots of a game can be given the same one.
+    """
+    if stream is None:
+        stream = sys.stdin.buffer
+    if record_path is None:
+        record_path = os.environ.get('PLANET_WARS_RECORD')
+    if latency_path is None:
+        latency_path = os.environ.get('PLANET_WARS_LATENCY')
+    recording = open(record_path, 'ab') if record_path else None
+    if latency_path:
+        latency_path = latency_path.replace('{bot}', os.path.splitext(os.path.basename(sys.argv[0]))[0])
+    latencies = open(latency_path, 'a') if latency_path else None
+
+    pending = bytearray()
+    scan = 0
+    try:
+        while True:
+            index = pending.find(b'go', scan)
+            if index >= 0 and (index == 0 or pending[index - 1] == ord('\n')):
+                line_end = pending.find(b'\n', index)
+                if line_end >= 0:
+                    # A complete "go" line ends the turn.
+                    turn = bytes(pending[:index])
+                    del pending[:line_end + 1]
+                    scan = 0
+                    if recording:
+                        recording.write(turn + b'go\n')
+                        recording.flush()
+                    handed_over = perf_counter()
+                    yield turn
+                    if latencies:
+                        latencies.write('%.3f\n' % ((perf_counter() - handed_over) * 1000))
+                        latencies.flush()
+                    continue
+                scan = index
+            elif index >= 0:
+                scan = index + 2
+                continue
+            else:
+                scan = max(len(pending) - 1, 0)
+
+            chunk = stream.read1(1 << 16)
+            if not chunk:
+                # A last "go" line without a newline still ends a turn, as it did when turns were read with input().
+                if pending.startswith(b'go', pending.rfind(b'\n') + 1):
+                    pending += b'\n'
+                    continue
+                return
+            pending += chunk
+    finally:
+        if recording:
+            recording.close()
+        if latencies:
+            latencies.close()
 
 
 def parse_game_state(pw_instance, state):
-    lines = state.split("\n")
+    if isinstance(state, str):
+        state = state.encode()
+
+    planet_lines, fleet_lines = [], []
+    for line in state.split(b'\n'):
+        if line.startswith(b'P'):
+            planet_lines.append(line)
+        elif line.startswith(b'F'):
+            fleet_lines.append(line)
 
-    planet_lines = [line for line in lines if line.startswith('P')]
-    fleet_lines = [line for line in lines if line.startswith('F')]
+    if len(planet_lines) != len(pw_instance.planets):
+        # First turn, or a different map: start over.
+        pw_instance._reset_planets(len(planet_lines))
 
+    previous_lines = pw_instance._planet_lines
+    moved = False
     for planet_id, line in enumerate(planet_lines):
-        line = line.split('#')[0]
-        params = line.split(' ')[1:]
-        assert len(params) == 5, 'Wrong planet specification: ' + line
+        if line == previous_lines[planet_id]:
+            continue
+        previous_lines[planet_id] = line
 
-        p = Planet(planet_id, *map(float, params))
-        pw_instance.planets.append(p)
+        params = line.split(b'#')[0].split()[1:]
+        assert len(params) == 5, 'Wrong planet specification: %r' % line
 
+        x, y, owner, num_ships, growth_rate = params
+        p = Planet(planet_id, float(x), float(y), int(owner), int(num_ships), int(growth_rate))
+        old = pw_instance.planets[planet_id]
+        moved = moved or old is None or old.x != p.x or old.y != p.y
+        pw_instance._set_planet(p)
+
+    if moved:
+        pw_instance.distances, pw_instance._neighbours = distance_table(pw_instance.planets)
+        pw_instance._spatial_index = None
+
+    # Every fleet moves each turn, so there is nothing to carry over from the last one.
+    pw_instance._reset_fleets()
     for line in fleet_lines:
-        line = line.split('#')[0]
-        params = line.split(' ')[1:]
-        assert len(params) == 6, 'Wrong fleet specification: ' + line
+        params = line.split(b'#')[0].split()[1:]
+        assert len(params) == 6, 'Wrong fleet specification: %r' % line
 
         f = Fleet(*map(int, params))
-        pw_instance.fleets.append(f)
+        pw_instance._add_fleet(f)
+
+
+# With PLANET_WARS_PROFILE=1, the phases of every turn are timed too (see profiling.py).
+if profiling.enabled:
+    parse_game_state = profiling.timed('parse')(parse_game_state)
+    issue_order = profiling.timed('issue_order')(issue_order)
+    finish_turn = profiling.timed('output')(finish_turn)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+#
+"""
+    Opt-in profiler for behavior tree nodes and the phases of a turn. While disabled, nothing is timed. While
+    enabled, every node's calls, successes and wall time (cumulative, own, and the most in a single turn) are
+    counted, along with the time spent parsing the game state, running the tree, issuing orders and writing them
+    out.
+
+    Phases don't overlap: orders are issued while the tree runs, and that time counts as issue_order only, so the
+    phases add up to the turn.
+
+    Profiling is switched on by setting PLANET_WARS_PROFILE=1 in the bot's environment. When the bot exits, the
+    node times are written next to it as <bot>.folded and the phase times, each a frame under one 'turn' root, as
+    <bot>.phases.folded, both in the folded-stacks format that flamegraph.pl and speedscope read; a summary table of
+    both goes to <bot>.profile.txt.
+"""
+import atexit, os, signal, sys
+from functools import wraps
+from time import perf_counter
+
+
+PHASES = ('parse', 'tree', 'issue_order', 'output')
+
+enabled = False
+_path = None
+_names = {}
+# Open nodes: [stack path, start time, time spent in children].
+_stack = []
+# Stack path -> [calls, successes, cumulative seconds, own seconds, most seconds in one turn].
+_nodes = {}
+# Phase -> [calls, seconds, most seconds in one turn].
+_phases = {}
+_turn = {}
+_turns = 0
+_parsed_at = None
+# Seconds of phases timed since parsing ended, which the tree phase leaves out.
+_nested = 0.0
+
+
+def enable(path):
+    """ Starts profiling; the results are written to `path`.folded, .phases.folded and .profile.txt at exit. """
+    global enabled, _path
+    _path = path
+    if not enabled:
+        atexit.register(flush)
+        _on_terminate.previous = signal.signal(signal.SIGTERM, _on_terminate)
+    enabled = True
+
+
+def _on_terminate(signum, frame):
+    # PlayGame terminates bots at the end of a game. The profile is written here and the process ends without
+    # raising SystemExit in the middle of a turn, where the bot's own exception handling could catch it.
+    flush()
+    if callable(_on_terminate.previous):
+        _on_terminate.previous(signum, frame)
+    os._exit(0)
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def enter(node):
+    name = _names.get(id(node))
+    if name is None:
+        # ';' separates frames in the folded format.
+        name = _names[id(node)] = str(node).replace(';', ',')
+    _stack.append([_stack[-1][0] + ';' + name if _stack else name, perf_counter(), 0.0])
+
+
+def leave(result):
+    path, start, child_time = _stack.pop()
+    elapsed = perf_counter() - start
+    if _stack:
+        _stack[-1][2] += elapsed
+    stats = _nodes.get(path)
+    if stats is None:
+        stats = _nodes[path] = [0, 0, 0.0, 0.0, 0.0]
+    stats[0] += 1
+    stats[1] += bool(result)
+    stats[2] += elapsed
+    stats[3] += elapsed - child_time
+    _turn[path] = _turn.get(path, 0.0) + elapsed
+
+
+def _count(name, seconds):
+    stats = _phases.get(name)
+    if stats is None:
+        stats = _phases[name] = [0, 0.0, 0.0]
+    stats[0] += 1
+    stats[1] += seconds
+    _turn[name] = _turn.get(name, 0.0) + seconds
+
+
+def phase(name, start, end):
+    """
+        Counts end - start seconds against a phase. Output ends the turn; the tree ran since parsing ended, less the
+        phases timed in the meantime.
+    """
+    global _parsed_at, _nested
+    if name == 'output' and _parsed_at is not None:
+        _count('tree', start - _parsed_at - _nested)
+    _count(name, end - start)
+
+    if name == 'parse':
+        _parsed_at, _nested = end, 0.0
+    elif name == 'output':
+        _parsed_at = None
+        end_turn()
+    elif _parsed_at is not None:
+        _nested += end - start
+
+
+def timed(name):
+    """ Decorates a function so that its calls count against a phase. """
+    def decorator(fn):
+        @wraps(fn)
+        def timed_fn(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                phase(name, start, perf_counter())
+        return timed_fn
+    return decorator
+
+
+def end_turn():
+    """ Folds this turn's node and phase times into the per-turn maximums. """
+    global _turns
+    _turns += 1
+    for key, seconds in _turn.items():
+        stats = _nodes[key] if key in _nodes else _phases[key]
+        stats[-1] = max(stats[-1], seconds)
+    _turn.clear()
+
+
+def folded():
+    """ Own time per node stack, in microseconds, one 'root;child;leaf count' line each. """
+    return ''.join('%s %d\n' % (path, round(stats[3] * 1e6)) for path, stats in sorted(_nodes.items()))
+
+
+def folded_phases():
+    """ Time per phase, in microseconds, one 'turn;phase count' line each. """
+    return ''.join('turn;%s %d\n' % (name, round(_phases[name][1] * 1e6)) for name in PHASES if name in _phases)
+
+
+def summary():
+    """ A table of calls, success rate and times per node and phase. """
+    turns = max(_turns, 1)
+    lines = ['%d turns' % _turns, '',
+             '%-60s %8s %8s %12s %12s %12s %12s' % ('node', 'calls', 'success', 'total ms', 'own ms', 'ms/turn',
+                                                   'max ms/turn')]
+    for path, (calls, successes, total, own, most) in sorted(_nodes.items(), key=lambda item: -item[1][2]):
+        name = '  ' * path.count(';') + path.rsplit(';', 1)[-1]
+        lines.append('%-60s %8d %7.1f%% %12.3f %12.3f %12.3f %12.3f' % (name[:60], calls, 100 * successes / calls,
+                                                                        total * 1000, own * 1000, total * 1000 / turns,
+                                                                        most * 1000))
+    lines += ['', '%-60s %8s %8s %12s %12s %12s %12s' % ('phase', 'calls', '', 'total ms', '', 'ms/turn',
+                                                        'max ms/turn')]
+    for name in PHASES:
+        if name in _phases:
+            calls, total, most = _phases[name]
+            lines.append('%-60s %8d %8s %12.3f %12s %12.3f %12.3f' % (name, calls, '', total * 1000, '',
+                                                                     total * 1000 / turns, most * 1000))
+    return '\n'.join(lines) + '\n'
+
+
+def flush():
+    """ Writes the folded stacks of nodes and of phases, and the summary table. """
+    if not enabled or _path is None:
+        return
+    if _turn:
+        end_turn()
+    with open(_path + '.folded', 'w') as folded_file:
+        folded_file.write(folded())
+    with open(_path + '.phases.folded', 'w') as folded_file:
+        folded_file.write(folded_phases())
+    with open(_path + '.profile.txt', 'w') as summary_file:
+        summary_file.write(summary())
+
+
+if os.environ.get('PLANET_WARS_PROFILE'):
+    enable(os.path.splitext(os.path.abspath(sys.argv[0]))[0])
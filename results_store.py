@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+#
+"""
+    Tournament results kept in SQLite, keyed by what decides a match: the content of the bot (its file, every
+    module of this repository it imports, and the PLANET_WARS_* settings it plays with, such as the tree spec in
+    PLANET_WARS_TREE), the same for the opponent, the content of the map, and a seed. A tournament run with a store
+    skips every pairing already in it, so after editing one bot only its matches are played again.
+
+    Each match records its outcome, turn count, whether the bot timed out and the bot's latency on every turn.
+
+    Usage: python results_store.py [results.db]   (win/loss summary per bot version and opponent)
+"""
+import ast, hashlib, os, sqlite3, sys, time
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# PLANET_WARS_* environment settings that only decide what a bot writes out, not how it plays. Every other one is
+# part of a bot's hash; so is the content of the file PLANET_WARS_TREE names, the tree bt_bot.py plays.
+OUTPUT_SETTINGS = ('PLANET_WARS_LATENCY', 'PLANET_WARS_PROFILE', 'PLANET_WARS_RECORD', 'PLANET_WARS_TRACE')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    bot TEXT, bot_hash TEXT, opponent TEXT, opponent_hash TEXT, map TEXT, map_hash TEXT, seed INTEGER,
+    outcome TEXT, turns INTEGER, timeouts INTEGER, mean_latency_ms REAL, max_latency_ms REAL, played_at REAL,
+    PRIMARY KEY (bot_hash, opponent_hash, map_hash, seed));
+CREATE TABLE IF NOT EXISTS latencies (
+    bot_hash TEXT, opponent_hash TEXT, map_hash TEXT, seed INTEGER, turn INTEGER, latency_ms REAL);
+CREATE INDEX IF NOT EXISTS latencies_by_match ON latencies (bot_hash, opponent_hash, map_hash, seed);
+CREATE INDEX IF NOT EXISTS results_by_map ON results (map, bot_hash);
+'''
+
+
+def file_hash(path):
+    with open(path, 'rb') as source_file:
+        return hashlib.sha1(source_file.read()).hexdigest()
+
+
+def _local_imports(path):
+    """ Files of this repository, or next to `path`, that the Python file at `path` imports. """
+    with open(path, 'rb') as source_file:
+        tree = ast.parse(source_file.read(), path)
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names += [node.module] + [node.module + '.' + alias.name for alias in node.names]
+    found = []
+    for name in names:
+        for directory in (os.path.dirname(os.path.abspath(path)), ROOT):
+            candidate = os.path.join(directory, *name.split('.')) + '.py'
+            if os.path.isfile(candidate):
+                found.append(candidate)
+                break
+    return found
+
+
+def bot_hash(bot_path, environ=None):
+    """
+        Hash of a bot file and, transitively, every module of this repository it imports, along with the settings
+        in `environ` (os.environ by default) the bot plays with.
+    """
+    environ = os.environ if environ is None else environ
+    files, queue = set(), [os.path.abspath(bot_path)]
+    while queue:
+        path = queue.pop()
+        if path not in files:
+            files.add(path)
+            queue += _local_imports(path)
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        digest.update(os.path.relpath(path, ROOT).encode('utf-8') + b'\0' + file_hash(path).encode('ascii'))
+    for name in sorted(environ):
+        if name.startswith('PLANET_WARS_') and name not in OUTPUT_SETTINGS:
+            value = environ[name]
+            if name == 'PLANET_WARS_TREE' and value:
+                value = file_hash(value)
+            digest.update(b'\0' + name.encode('utf-8') + b'=' + value.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ResultStore:
+    def __init__(self, path='results.db'):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def get(self, bot_hash, opponent_hash, map_hash, seed=0):
+        """ The stored outcome and turn count of a match, or None if it was never played. """
+        return self.connection.execute('SELECT outcome, turns FROM results WHERE bot_hash = ? AND opponent_hash = ? '
+                                       'AND map_hash = ? AND seed = ?',
+                                       (bot_hash, opponent_hash, map_hash, seed)).fetchone()
+
+    def record(self, bot, bot_hash, opponent, opponent_hash, map_name, map_hash, seed, outcome, turns, latencies):
+        """ Stores a match, replacing any earlier result for the same key. """
+        key = (bot_hash, opponent_hash, map_hash, seed)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (bot, bot_hash, opponent, opponent_hash, map_name, map_hash, seed, outcome, turns,
+                                     int(outcome == 'timeout'),
+                                     sum(latencies) / len(latencies) if latencies else None,
+                                     max(latencies) if latencies else None, time.time()))
+            self.connection.execute('DELETE FROM latencies WHERE bot_hash = ? AND opponent_hash = ? AND map_hash = ? '
+                                    'AND seed = ?', key)
+            self.connection.executemany('INSERT INTO latencies VALUES (?, ?, ?, ?, ?, ?)',
+                                        [key + (turn, latency) for turn, latency in enumerate(latencies, 1)])
+
+    def summary(self, bot_hash=None):
+        """
+            Per bot version and opponent: matches, wins, losses, timeouts, mean turns and mean latency, newest bot
+            versions first.
+        """
+        where, parameters = ('WHERE bot_hash = ?', (bot_hash,)) if bot_hash else ('', ())
+        return self.connection.execute(
+            "SELECT bot, bot_hash, opponent, COUNT(*), SUM(outcome = 'win'), SUM(outcome = 'loss'), SUM(timeouts), "
+            'AVG(turns), AVG(mean_latency_ms), MAX(played_at) AS last FROM results ' + where +
+            ' GROUP BY bot_hash, opponent_hash ORDER BY last DESC, opponent', parameters).fetchall()
+
+    def latency_percentile(self, bot_hash, percentile):
+        """ The bot version's per-turn latency at the given percentile, over every stored turn. """
+        count, = self.connection.execute('SELECT COUNT(*) FROM latencies WHERE bot_hash = ?', (bot_hash,)).fetchone()
+        if not count:
+            return None
+        offset = min(count - 1, int(percentile / 100 * count))
+        return self.connection.execute('SELECT latency_ms FROM latencies WHERE bot_hash = ? ORDER BY latency_ms '
+                                       'LIMIT 1 OFFSET ?', (bot_hash, offset)).fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    store = ResultStore(sys.argv[1] if len(sys.argv) > 1 else 'results.db')
+    print('%-32s %-10s %-32s %7s %6s %6s %8s %8s %12s' % ('bot', 'version', 'opponent', 'matches', 'wins', 'losses',
+                                                          'timeouts', 'turns', 'latency ms'))
+    for bot, version, opponent, matches, wins, losses, timeouts, turns, latency, _ in store.summary():
+        print('%-32s %-10s %-32s %7d %6d %6d %8d %8.1f %12s' % (bot, version[:10], opponent, matches, wins, losses,
+                                                                timeouts, turns or 0,
+                                                                '%.2f' % latency if latency is not None else '-'))
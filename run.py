@@ -1,5 +1,22 @@
 import subprocess
-import os, sys
+import io, os, re, sys, tempfile
+from collections import Counter
+from multiprocessing import Pool
+
+
+# PlayGame's report lines, from the point of view of player 1 (our bot).
+OUTCOMES = [('1 timed out', 'timeout'),
+            ('2 timed out', 'opponent timeout'),
+            ('1 crashed', 'crash'),
+            ('2 crashed', 'opponent crash'),
+            ('Player 1 Wins!', 'win'),
+            ('Player 2 Wins!', 'loss'),
+            ('Draw!', 'draw')]
+# Outcomes that say nothing about our bot, so the match is played again: the opponent crashing, no result at all,
+# or a match the harness killed for running past its timeout. Our own bot crashing is a result like any other.
+RETRIED = ('opponent crash', 'killed', 'no result')
+# Every match runs PlayGame's JVM and the two bots' Python processes.
+PROCESSES_PER_MATCH = 3
 
 
 def show_match(bot, opponent_bot, map_num):
@@ -52,6 +69,104 @@ def test(bot, opponent_bot, map_num):
             break
 
 
+def play_match(match):
+    """
+        Plays one (bot, opponent_bot, map_num) match headless and returns the outcome for the bot, the number of
+        turns played and the bot's latency on each turn in milliseconds, along with the game's playback output if
+        keep_playback is set. A match where the opponent crashes or that ends without a result is retried up to
+        `retries` times, and so is one that runs longer than `timeout` seconds, which is killed; if that keeps
+        happening it is reported as 'killed', apart from PlayGame's own timeouts. Our bot crashing is not retried.
+    """
+    bot, opponent_bot, map_num, timeout, retries, keep_playback = match
+    outcome, playback, turns, latencies = 'no result', '', 0, []
+    for attempt in range(retries + 1):
+        # Every match gets its own game log and latency file so that parallel matches don't overwrite each other's.
+        with tempfile.TemporaryDirectory() as log_dir:
+            # Each bot writes its latencies to its own file, named after its script (see planet_wars.read_turns).
+            latency_paths = os.path.join(log_dir, '{bot}.latency')
+            latency_path = latency_paths.replace('{bot}', os.path.splitext(os.path.basename(bot))[0])
+            command = ['java', '-jar', 'tools/PlayGame.jar', 'maps/map' + str(map_num) + '.txt', '1000', '1000',
+                       os.path.join(log_dir, 'log.txt'), 'python ' + bot, 'python ' + opponent_bot]
+            try:
+                # The playback goes to stdout, PlayGame's reports to stderr. PlayGame's bot processes inherit the
+                # environment.
+                completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout,
+                                           env=dict(os.environ, PLANET_WARS_LATENCY=latency_paths))
+            except subprocess.TimeoutExpired:
+                outcome, playback, turns, latencies = 'killed', '', 0, []
+                continue
+            latencies = []
+            # A bot playing a copy of itself shares its latency file with the copy, which makes it meaningless.
+            if os.path.exists(latency_path) and os.path.basename(bot) != os.path.basename(opponent_bot):
+                with open(latency_path) as latency_file:
+                    latencies = [float(line) for line in latency_file if line.strip()]
+        playback = completed.stdout.decode('utf-8', 'replace')
+        output = completed.stderr.decode('utf-8', 'replace') + playback
+
+        outcome = next((result for line in output.splitlines() for report, result in OUTCOMES if report in line),
+                       'no result')
+        # PlayGame reports each turn as "Turn N"; without those, the bot's own turn count will do.
+        turns = max([int(turn) for turn in re.findall(r'^Turn (\d+)', output, re.MULTILINE)] or [len(latencies)])
+        if outcome not in RETRIED:
+            break
+    return opponent_bot, map_num, outcome, playback if keep_playback else '', turns, latencies
+
+
+def tournament(bot, opponent_bots, maps, num_workers=None, timeout=300, retries=2, archive_path=None,
+               store_path=None, seed=0):
+    """
+        Plays the bot against every opponent on every map on a pool of num_workers processes (by default, one for
+        every PROCESSES_PER_MATCH cores, so that bots don't time out waiting for a core). Results are printed as
+        matches finish, followed by a win/loss/timeout report per opponent. With an archive_path, every finished
+        game is also stored in that game archive (see game_records.py).
+
+        With a store_path, results are kept in that results store (see results_store.py): pairings whose bot,
+        opponent and map are unchanged since they were stored, under the same seed, are counted from the store
+        instead of being played again.
+    """
+    totals = {opponent_bot: Counter() for opponent_bot in opponent_bots}
+    archive = store = None
+    if archive_path is not None:
+        from game_records import GameArchive, read_playback
+        archive = GameArchive(archive_path)
+    if store_path is not None:
+        from results_store import ResultStore, bot_hash, file_hash
+        store = ResultStore(store_path)
+        hashes = {path: bot_hash(path) for path in [bot] + list(opponent_bots)}
+        hashes.update({map_num: file_hash('maps/map' + str(map_num) + '.txt') for map_num in maps})
+
+    matches = []
+    for opponent_bot in opponent_bots:
+        for map_num in maps:
+            stored = store and store.get(hashes[bot], hashes[opponent_bot], hashes[map_num], seed)
+            if stored:
+                totals[opponent_bot][stored[0]] += 1
+            else:
+                matches.append((bot, opponent_bot, map_num, timeout, retries, archive_path is not None))
+    if store:
+        print(len(opponent_bots) * len(maps) - len(matches), 'matches unchanged since stored,', len(matches),
+              'to play', flush=True)
+
+    with Pool(num_workers or max(1, os.cpu_count() // PROCESSES_PER_MATCH)) as pool:
+        results = pool.imap_unordered(play_match, matches)
+        for played, (opponent_bot, map_num, outcome, playback, turns, latencies) in enumerate(results, 1):
+            totals[opponent_bot][outcome] += 1
+            print('[%d/%d]' % (played, len(matches)), opponent_bot, 'map' + str(map_num) + ':', outcome, flush=True)
+            snapshots = list(read_playback(io.StringIO(playback))) if archive is not None else []
+            if snapshots:
+                archive.add_game(snapshots, map='map' + str(map_num), bot=bot, opponent=opponent_bot, outcome=outcome)
+            # Only finished games are stored; the rest are played again on the next run.
+            if store and outcome not in RETRIED:
+                store.record(bot, hashes[bot], opponent_bot, hashes[opponent_bot], 'map' + str(map_num),
+                             hashes[map_num], seed, outcome, turns, latencies)
+
+    columns = [outcome for _, outcome in OUTCOMES] + ['killed', 'no result']
+    print('\n%-32s' % 'opponent' + ''.join('%17s' % column for column in columns))
+    for opponent_bot, counts in totals.items():
+        print('%-32s' % opponent_bot + ''.join('%17d' % counts[column] for column in columns))
+    return totals
+
+
 if __name__ == '__main__':
     path =  os.getcwd()
     opponents = ['opponent_bots/easy_bot.py',
@@ -63,6 +178,13 @@ if __name__ == '__main__':
     maps = [71, 13, 24, 56, 7]
 
     my_bot = 'behavior_tree_bot/bt_bot.py'
+    if len(sys.argv) >= 2 and sys.argv[1] == 'tournament':
+        # python run.py tournament [num_workers] [archive or -] [results.db]: every opponent on map1-map100.
+        tournament(my_bot, opponents, range(1, 101), int(sys.argv[2]) if len(sys.argv) > 2 else None,
+                   archive_path=sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] != '-' else None,
+                   store_path=sys.argv[4] if len(sys.argv) > 4 else None)
+        sys.exit()
+
     show = len(sys.argv) < 2 or sys.argv[1] == "show"
     for opponent, map in zip(opponents, maps):
         # use this command if you want to observe the bots
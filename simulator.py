@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+#
+"""
+    In-process Planet Wars engine. Plays many games in lockstep with the same rules as tools/PlayGame.jar, so a
+    bot's do_turn can be evaluated without a JVM or any subprocess I/O.
+
+    Each turn follows PlayGame: orders leave their source planet immediately, then every owned planet grows,
+    every fleet advances one step, and a battle is fought at each planet that fleets arrived at.
+"""
+from collections import namedtuple
+import logging, traceback, sys, os
+import importlib.util
+
+import numpy as np
+
+import planet_wars
+from planet_wars import PlanetWars
+
+
+GameResult = namedtuple('GameResult', ['winner', 'turns', 'player_1_ships', 'player_2_ships'])
+
+# Owner relabelling used to show player 2 the game from its own point of view, like PlayGame does.
+_SWAP_OWNERS = np.array([0, 2, 1])
+
+
+def read_map(map_path):
+    with open(map_path) as map_file:
+        return map_file.read()
+
+
+class BatchGame:
+    def __init__(self, map_texts, max_turns=1000):
+        games = [PlanetWars(text) for text in map_texts]
+        num_games = len(games)
+        num_planets = max(len(game.planets) for game in games)
+
+        self.max_turns = max_turns
+        self.turn = 0
+
+        # Planet columns, one row per game. Maps with fewer planets are padded with neutral, empty planets that
+        # no fleet can ever be sent to.
+        self.x = np.zeros((num_games, num_planets))
+        self.y = np.zeros((num_games, num_planets))
+        self.owner = np.zeros((num_games, num_planets), dtype=np.int64)
+        self.ships = np.zeros((num_games, num_planets), dtype=np.int64)
+        self.growth = np.zeros((num_games, num_planets), dtype=np.int64)
+        self.num_planets = np.array([len(game.planets) for game in games])
+
+        fleets = []
+        for g, game in enumerate(games):
+            for p in game.planets:
+                self.x[g, p.ID], self.y[g, p.ID] = p.x, p.y
+                self.owner[g, p.ID], self.ships[g, p.ID], self.growth[g, p.ID] = p.owner, p.num_ships, p.growth_rate
+            fleets.extend((g,) + tuple(f) for f in game.fleets)
+
+        dx = self.x[:, :, None] - self.x[:, None, :]
+        dy = self.y[:, :, None] - self.y[:, None, :]
+        self.distances = np.ceil(np.sqrt(dx * dx + dy * dy)).astype(np.int64)
+
+        # Fleet table, one row per fleet in flight across all games.
+        fleets = np.array(fleets, dtype=np.int64).reshape(-1, 7)
+        self.fleet_game, self.fleet_owner, self.fleet_ships, self.fleet_source, self.fleet_destination, \
+            self.fleet_total_trip_length, self.fleet_turns_remaining = fleets.T.copy()
+
+        # -1 while a game is running, then 0 for a draw or the winning player.
+        self.winner = np.full(num_games, -1, dtype=np.int64)
+        self.turns = np.zeros(num_games, dtype=np.int64)
+        self.final_ships = np.zeros((num_games, 2), dtype=np.int64)
+
+    @property
+    def running(self):
+        return self.winner < 0
+
+    def total_ships(self, player):
+        ships = np.where(self.owner == player, self.ships, 0).sum(axis=1)
+        np.add.at(ships, self.fleet_game[self.fleet_owner == player], self.fleet_ships[self.fleet_owner == player])
+        return ships
+
+    def state_text(self, game, player=1):
+        """ Renders a game as PlayGame would send it to the given player. """
+        num_planets = self.num_planets[game]
+        owners = self.owner[game] if player == 1 else _SWAP_OWNERS[self.owner[game]]
+        lines = ["P %r %r %d %d %d" % planet for planet in zip(self.x[game, :num_planets].tolist(),
+                                                             self.y[game, :num_planets].tolist(),
+                                                             owners[:num_planets].tolist(),
+                                                             self.ships[game, :num_planets].tolist(),
+                                                             self.growth[game, :num_planets].tolist())]
+        in_game = self.fleet_game == game
+        fleet_owners = self.fleet_owner[in_game] if player == 1 else _SWAP_OWNERS[self.fleet_owner[in_game]]
+        lines += ["F %d %d %d %d %d %d" % fleet for fleet in zip(fleet_owners.tolist(),
+                                                                self.fleet_ships[in_game].tolist(),
+                                                                self.fleet_source[in_game].tolist(),
+                                                                self.fleet_destination[in_game].tolist(),
+                                                                self.fleet_total_trip_length[in_game].tolist(),
+                                                                self.fleet_turns_remaining[in_game].tolist())]
+        return '\n'.join(lines) + '\n'
+
+    def bot_orders(self, do_turn, game, player):
+        """ Runs do_turn on the given player's view of a game and returns the orders it issued. """
+        state = PlanetWars(self.state_text(game, player))
+        num_fleets = len(state.fleets)
+        try:
+            do_turn(state)
+        finally:
+            # Nothing is sent to a real game, so drop the orders queued for finish_turn.
+            planet_wars.orders.clear()
+        # issue_order appends every accepted order to state.fleets; %d in the order protocol truncates ship counts.
+        return [(fleet.source_planet, fleet.destination_planet, int(fleet.num_ships))
+                for fleet in state.fleets[num_fleets:] if fleet.owner == 1]
+
+    def issue_orders(self, games, players, sources, destinations, num_ships):
+        """
+            Applies a batch of orders from any number of games. Orders for the same source are checked in the
+            order they were given, exactly as PlayGame checks them one at a time. A player giving an illegal order
+            is dropped and loses the game.
+        """
+        games, players = np.asarray(games, dtype=np.int64), np.asarray(players, dtype=np.int64)
+        sources, destinations = np.asarray(sources, dtype=np.int64), np.asarray(destinations, dtype=np.int64)
+        num_ships = np.asarray(num_ships, dtype=np.int64)
+        if not len(games):
+            return
+
+        in_range = (sources >= 0) & (sources < self.num_planets[games]) & \
+                   (destinations >= 0) & (destinations < self.num_planets[games])
+        sources, destinations = np.where(in_range, sources, 0), np.where(in_range, destinations, 0)
+
+        # Running total of ships taken from each source planet, in issue order.
+        order = np.lexsort((np.arange(len(games)), sources, games))
+        sent = np.cumsum(num_ships[order])
+        group_start = np.r_[True, (games[order][1:] != games[order][:-1]) |
+                                  (sources[order][1:] != sources[order][:-1])]
+        group = np.cumsum(group_start) - 1
+        sent -= (sent - num_ships[order])[group_start][group]
+        taken = np.empty_like(sent)
+        taken[order] = sent
+
+        legal = in_range & (self.owner[games, sources] == players) & (num_ships >= 0) & \
+            (taken <= self.ships[games, sources])
+        for game, player in set(zip(games[~legal].tolist(), players[~legal].tolist())):
+            logging.debug('Game %d: player %d issued an illegal order and is dropped', game, player)
+            self._drop_player(game, player)
+
+        keep = legal & self.running[games]
+        games, players = games[keep], players[keep]
+        sources, destinations, num_ships = sources[keep], destinations[keep], num_ships[keep]
+        np.subtract.at(self.ships, (games, sources), num_ships)
+
+        distances = self.distances[games, sources, destinations]
+        self.fleet_game = np.r_[self.fleet_game, games]
+        self.fleet_owner = np.r_[self.fleet_owner, players]
+        self.fleet_ships = np.r_[self.fleet_ships, num_ships]
+        self.fleet_source = np.r_[self.fleet_source, sources]
+        self.fleet_destination = np.r_[self.fleet_destination, destinations]
+        self.fleet_total_trip_length = np.r_[self.fleet_total_trip_length, distances]
+        self.fleet_turns_remaining = np.r_[self.fleet_turns_remaining, distances]
+
+    def _drop_player(self, game, player):
+        if self.winner[game] == 3 - player:
+            # Both players were dropped on the same turn.
+            self.winner[game] = 0
+        elif self.winner[game] < 0:
+            self.winner[game] = 3 - player
+            self.turns[game] = self.turn
+
+    def advance(self):
+        """ Plays one time step of every running game: growth, fleet movement and battles. """
+        running = self.running
+        moving = running[self.fleet_game]
+
+        # (1) Every owned planet grows.
+        self.ships += np.where(running[:, None] & (self.owner > 0), self.growth, 0)
+
+        # (2) Fleets move one step closer to their destination.
+        self.fleet_turns_remaining -= moving
+        arrived = moving & (self.fleet_turns_remaining <= 0)
+
+        # (3) Battles: every force at a planet, garrison included, is pooled per owner. The largest force takes the
+        #     planet with what is left after fighting the second largest; on a tie the owner keeps it with no ships.
+        forces = np.zeros(self.owner.shape + (3,), dtype=np.int64)
+        np.put_along_axis(forces, self.owner[:, :, None], self.ships[:, :, None], axis=2)
+        np.add.at(forces, (self.fleet_game[arrived], self.fleet_destination[arrived], self.fleet_owner[arrived]),
+                  self.fleet_ships[arrived])
+        contested = np.zeros(self.owner.shape, dtype=bool)
+        contested[self.fleet_game[arrived], self.fleet_destination[arrived]] = True
+
+        ranked = np.argsort(forces, axis=2)
+        first = np.take_along_axis(forces, ranked[:, :, 2:], axis=2)[:, :, 0]
+        second = np.take_along_axis(forces, ranked[:, :, 1:2], axis=2)[:, :, 0]
+        new_owner = np.where(first > second, ranked[:, :, 2], self.owner)
+        self.owner = np.where(contested, new_owner, self.owner)
+        self.ships = np.where(contested, first - second, self.ships)
+
+        self._remove_fleets(~arrived)
+        self.turn += 1
+        self._check_game_over()
+
+    def _remove_fleets(self, keep):
+        self.fleet_game, self.fleet_owner, self.fleet_ships = \
+            self.fleet_game[keep], self.fleet_owner[keep], self.fleet_ships[keep]
+        self.fleet_source, self.fleet_destination = self.fleet_source[keep], self.fleet_destination[keep]
+        self.fleet_total_trip_length = self.fleet_total_trip_length[keep]
+        self.fleet_turns_remaining = self.fleet_turns_remaining[keep]
+
+    def _check_game_over(self):
+        running = self.running
+        ships_1, ships_2 = self.total_ships(1), self.total_ships(2)
+
+        alive = np.zeros((len(self.winner), 3), dtype=bool)
+        alive[np.nonzero(self.owner)[0], self.owner[self.owner > 0]] = True
+        alive[self.fleet_game, self.fleet_owner] = True
+        alive_1, alive_2 = alive[:, 1], alive[:, 2]
+
+        out_of_turns = self.turn >= self.max_turns
+        over = running & (~alive_1 | ~alive_2 | out_of_turns)
+        winner = np.where(alive_1 & ~alive_2, 1, np.where(alive_2 & ~alive_1, 2, 0))
+        # At the turn limit the player with more ships wins.
+        by_ships = np.where(ships_1 > ships_2, 1, np.where(ships_2 > ships_1, 2, 0))
+        winner = np.where(alive_1 & alive_2, by_ships, winner)
+
+        self.winner = np.where(over, winner, self.winner)
+        self.turns = np.where(over, self.turn, self.turns)
+        self.final_ships[:, 0] = np.where(running, ships_1, self.final_ships[:, 0])
+        self.final_ships[:, 1] = np.where(running, ships_2, self.final_ships[:, 1])
+        # Fleets of finished games are no longer needed.
+        self._remove_fleets(self.running[self.fleet_game])
+
+    def step(self, do_turn_1, do_turn_2):
+        """ Asks both bots for their orders in every running game, then advances all games by one turn. """
+        orders = []
+        for game in np.flatnonzero(self.running):
+            for player, do_turn in ((1, do_turn_1), (2, do_turn_2)):
+                try:
+                    orders.extend((game, player) + order for order in self.bot_orders(do_turn, game, player))
+                except Exception:
+                    logging.exception('Game %d: player %d crashed', game, player)
+                    self._drop_player(game, player)
+
+        self.issue_orders(*np.array(orders, dtype=np.int64).reshape(-1, 5).T)
+        self.advance()
+
+    def play(self, do_turn_1, do_turn_2):
+        """ Plays every game to completion and returns one GameResult per map. """
+        while self.running.any():
+            self.step(do_turn_1, do_turn_2)
+        return self.results()
+
+    def results(self):
+        return [GameResult(*result) for result in zip(self.winner.tolist(), self.turns.tolist(),
+                                                      self.final_ships[:, 0].tolist(),
+                                                      self.final_ships[:, 1].tolist())]
+
+
+def play_games(do_turn_1, do_turn_2, map_paths, max_turns=1000):
+    """ Plays do_turn_1 as player 1 against do_turn_2 on each of the given maps. """
+    return BatchGame([read_map(path) for path in map_paths], max_turns).play(do_turn_1, do_turn_2)
+
+
+def load_bot(bot_path):
+    """ Imports a bot file, such as opponent_bots/spread_bot.py, and returns its do_turn function. """
+    name = os.path.splitext(os.path.basename(bot_path))[0]
+    spec = importlib.util.spec_from_file_location(name, bot_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if hasattr(module, 'setup_behavior_tree') and not hasattr(module, 'behavior_tree'):
+        module.behavior_tree = module.setup_behavior_tree()
+    return module.do_turn
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('Usage: python simulator.py <bot> <opponent_bot> [map_num ...]')
+        sys.exit(1)
+
+    bot, opponent_bot = sys.argv[1:3]
+    map_nums = [int(num) for num in sys.argv[3:]] or list(range(1, 101))
+    do_turn_1, do_turn_2 = load_bot(bot), load_bot(opponent_bot)
+    # bt_bot.py logs its tree whenever one is built; none of that belongs in this output.
+    logging.disable(logging.INFO)
+
+    try:
+        results = play_games(do_turn_1, do_turn_2, ['maps/map%d.txt' % num for num in map_nums])
+    except Exception:
+        traceback.print_exc(file=sys.stdout)
+        sys.exit(1)
+
+    for num, result in zip(map_nums, results):
+        print('map%d:' % num, {0: 'draw', 1: bot, 2: opponent_bot}[result.winner], 'in', result.turns, 'turns')
+    wins = sum(result.winner == 1 for result in results)
+    losses = sum(result.winner == 2 for result in results)
+    print(bot, 'won', wins, 'lost', losses, 'drew', len(results) - wins - losses)
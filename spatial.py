@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+#
+"""
+    Spatial index over planet coordinates. A k-d tree, built once per map, answers nearest-planet and within-reach
+    questions by visiting only the part of the map near the query point instead of scanning every planet.
+
+    Game distances are Euclidean distances rounded up, so for a whole number of turns t, a planet is within t turns
+    exactly when its Euclidean distance is at most t, and the nearest planets are the same under either measure.
+"""
+from heapq import heappush, heappushpop
+
+
+class KDTree:
+    """
+        Balanced 2-d tree stored in a flat list: the planet at the middle of a slice splits it on x or y (alternating
+        with depth), and the two halves of the slice hold its subtrees.
+    """
+    def __init__(self, points):
+        # points: (x, y) per ID.
+        self.points = [(float(x), float(y)) for x, y in points]
+        self.order = list(range(len(self.points)))
+        self._build(0, len(self.order), 0)
+
+    def _build(self, low, high, axis):
+        if high - low <= 1:
+            return
+        middle = (low + high) // 2
+        self.order[low:high] = sorted(self.order[low:high], key=lambda ID: (self.points[ID][axis], ID))
+        self._build(low, middle, 1 - axis)
+        self._build(middle + 1, high, 1 - axis)
+
+    def nearest(self, x, y, k=1, accept=None):
+        """
+            IDs of the k points nearest to (x, y), nearest first (ties by ID), among those for which accept(ID) is
+            true if given.
+        """
+        if k <= 0:
+            return []
+        # Min-heap of the best k so far as (-squared distance, -ID), so that the worst of them is on top.
+        best = []
+        points, order = self.points, self.order
+        # Slices to visit, with a lower bound on the squared distance of any point in them.
+        stack = [(0, len(order), 0, 0.0)]
+        while stack:
+            low, high, axis, bound = stack.pop()
+            if low >= high or (len(best) == k and bound > -best[0][0]):
+                continue
+            middle = (low + high) // 2
+            ID = order[middle]
+            px, py = points[ID]
+            if accept is None or accept(ID):
+                dx, dy = px - x, py - y
+                entry = (-(dx * dx + dy * dy), -ID)
+                if len(best) < k:
+                    heappush(best, entry)
+                elif entry > best[0]:
+                    heappushpop(best, entry)
+
+            offset = (x - px) if axis == 0 else (y - py)
+            near, far = ((low, middle), (middle + 1, high)) if offset < 0 else ((middle + 1, high), (low, middle))
+            # The far side is at least as far as the splitting line; the near side is visited first.
+            stack.append((far[0], far[1], 1 - axis, max(bound, offset * offset)))
+            stack.append((near[0], near[1], 1 - axis, bound))
+        return [-ID for _, ID in sorted(best, reverse=True)]
+
+    def within(self, x, y, radius):
+        """ IDs of the points at most `radius` from (x, y), in ID order. """
+        found = []
+        points, order = self.points, self.order
+        limit = radius * radius
+        stack = [(0, len(order), 0)]
+        while stack:
+            low, high, axis = stack.pop()
+            if low >= high:
+                continue
+            middle = (low + high) // 2
+            ID = order[middle]
+            px, py = points[ID]
+            dx, dy = px - x, py - y
+            if dx * dx + dy * dy <= limit:
+                found.append(ID)
+
+            offset = dx if axis == 0 else dy
+            # Points left of (or below) the split can be in range only if the circle reaches past it, and vice versa.
+            if offset >= -radius:
+                stack.append((low, middle, 1 - axis))
+            if offset <= radius:
+                stack.append((middle + 1, high, 1 - axis))
+        return sorted(found)
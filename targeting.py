@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+"""
+    Shared targeting for bots: which of our planets send ships where. The greedy walks reproduce the loops the
+    opponent bots were written with, order for order, but order planets with a heap so that a walk that stops early
+    doesn't pay for sorting all of them.
+
+    Targets that already have one of our fleets on the way are found with the state's arrival index, and distances
+    come from its precomputed table.
+"""
+from heapq import heapify, heappop
+
+from planet_wars import issue_order
+
+
+def by_ships(planets, descending=False):
+    """ Yields planets from fewest to most ships (or most to fewest); ties keep their order, like a stable sort. """
+    heap = [(-planet.num_ships if descending else planet.num_ships, index, planet)
+            for index, planet in enumerate(planets)]
+    heapify(heap)
+    while heap:
+        yield heappop(heap)[2]
+
+
+def untargeted(state, planets, player_id=1):
+    """ The planets that no fleet of the player is headed to. """
+    return [planet for planet in planets if not state.has_incoming(planet.ID, player_id)]
+
+
+def required_ships(state, source, target):
+    """ Ships needed to take the target: its garrison, plus what an enemy planet grows while the fleet travels. """
+    if target.owner == 0:
+        return target.num_ships + 1
+    return target.num_ships + state.distance(source.ID, target.ID) * target.growth_rate + 1
+
+
+def greedy_capture(state, sources, targets, required=required_ships, skip='source'):
+    """
+        Walks sources and targets in the given orders. Whenever the current source has more ships than the current
+        target requires, it sends them and both move on; otherwise the walk moves on to the next source (skip=
+        'source') or to the next target (skip='target').
+    """
+    sources, targets = iter(sources), iter(targets)
+    source, target = next(sources, None), next(targets, None)
+    while source is not None and target is not None:
+        num_ships = required(state, source, target)
+        if source.num_ships > num_ships:
+            issue_order(state, source.ID, target.ID, num_ships)
+            source, target = next(sources, None), next(targets, None)
+        elif skip == 'source':
+            source = next(sources, None)
+        else:
+            target = next(targets, None)
+
+
+############################### Opponent strategies ##################################
+def spread(state):
+    """ Takes the weakest untargeted neutral planets with our weakest planets that can afford them. """
+    greedy_capture(state, by_ships(state.my_planets()), by_ships(untargeted(state, state.neutral_planets())))
+
+
+def attack(state):
+    """ Takes the weakest untargeted enemy planets with our weakest planets that can afford them. """
+    greedy_capture(state, by_ships(state.my_planets()), by_ships(untargeted(state, state.enemy_planets())))
+
+
+def produce(state):
+    """ Takes the strongest untargeted planets we don't own with our strongest planets. """
+    greedy_capture(state, by_ships(state.my_planets(), descending=True),
+                   by_ships(untargeted(state, state.not_my_planets()), descending=True), skip='target')
+
+
+def defend(state):
+    """ Evens out our planets' strength, ships plus incoming friendly minus incoming enemy ships, around the mean. """
+    my_planets = state.my_planets()
+    if not my_planets:
+        return
+
+    def strength(p):
+        return p.num_ships + state.incoming_ships(p.ID, 1) - state.incoming_ships(p.ID, 2)
+
+    avg = sum(strength(planet) for planet in my_planets) / len(my_planets)
+
+    weak_planets = [planet for planet in my_planets if strength(planet) < avg]
+    strong_planets = [planet for planet in my_planets if strength(planet) > avg]
+    if not weak_planets or not strong_planets:
+        return
+
+    weak_planets = iter(sorted(weak_planets, key=strength))
+    strong_planets = iter(sorted(strong_planets, key=strength, reverse=True))
+    weak_planet, strong_planet = next(weak_planets), next(strong_planets)
+    while weak_planet is not None and strong_planet is not None:
+        need = int(avg - strength(weak_planet))
+        have = int(strength(strong_planet) - avg)
+
+        if have >= need > 0:
+            issue_order(state, strong_planet.ID, weak_planet.ID, need)
+            weak_planet = next(weak_planets, None)
+        elif have > 0:
+            issue_order(state, strong_planet.ID, weak_planet.ID, have)
+            strong_planet = next(strong_planets, None)
+        else:
+            strong_planet = next(strong_planets, None)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#
+"""
+    Compact in-memory tracing for behavior tree nodes and orders. While disabled, nothing is recorded and traced
+    code paths cost a single flag check. While enabled, every event is packed into a fixed-size binary ring buffer
+    that is written out once, when the bot exits or crashes.
+
+    Tracing is switched on by setting PLANET_WARS_TRACE=1 in the bot's environment; the trace is written next to
+    the bot as <bot>.trace. Render one as text with: python tracing.py <bot>.trace
+"""
+import atexit, os, signal, struct, sys, time
+
+
+# Event kinds.
+ENTER, EXIT, ORDER, BAD_ORDER, TURN = range(5)
+
+# kind, result, node ID or source planet, destination planet, ship count, timestamp. IDs are signed, so that bad
+# orders with negative planet IDs can be recorded too.
+RECORD = struct.Struct('<BBiidd')
+HEADER = struct.Struct('<4sII')
+MAGIC = b'PWT2'
+
+enabled = False
+_buffer = bytearray()
+_capacity = 0
+_count = 0
+_node_IDs = {}
+_node_names = []
+_path = None
+
+
+def enable(path, capacity=1 << 16):
+    """ Starts recording into a ring buffer of the last `capacity` events, written to `path` at exit. """
+    global enabled, _buffer, _capacity, _count, _path
+    _buffer = bytearray(capacity * RECORD.size)
+    _capacity, _count, _path = capacity, 0, path
+    if not enabled:
+        atexit.register(flush)
+        _on_terminate.previous = signal.signal(signal.SIGTERM, _on_terminate)
+    enabled = True
+
+
+def _on_terminate(signum, frame):
+    # PlayGame terminates bots at the end of a game. The trace is written here and the process ends without raising
+    # SystemExit in the middle of a turn, where the bot's own exception handling could catch it.
+    flush()
+    if callable(_on_terminate.previous):
+        _on_terminate.previous(signum, frame)
+    os._exit(0)
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def node_ID(node):
+    ID = _node_IDs.get(id(node))
+    if ID is None:
+        ID = _node_IDs[id(node)] = len(_node_names)
+        _node_names.append(str(node))
+    return ID
+
+
+def record(kind, a=0, b=0, value=0.0, result=False):
+    global _count
+    RECORD.pack_into(_buffer, (_count % _capacity) * RECORD.size, kind, bool(result), a, b, value,
+                     time.perf_counter())
+    _count += 1
+
+
+def flush():
+    """ Writes the node names and the buffered events, oldest first, to the trace file. """
+    if not enabled or _path is None:
+        return
+    if _count <= _capacity:
+        events = _buffer[:_count * RECORD.size]
+    else:
+        split = (_count % _capacity) * RECORD.size
+        events = _buffer[split:] + _buffer[:split]
+    names = '\n'.join(_node_names).encode('utf-8')
+    with open(_path, 'wb') as trace_file:
+        trace_file.write(HEADER.pack(MAGIC, len(names), len(events) // RECORD.size))
+        trace_file.write(names)
+        trace_file.write(events)
+
+
+def decode(data):
+    """ Renders a trace file's contents in the bot log's indented Executing/Result style. """
+    magic, names_size, num_events = HEADER.unpack_from(data)
+    assert magic == MAGIC, 'Not a trace file'
+    names = data[HEADER.size:HEADER.size + names_size].decode('utf-8').split('\n')
+    lines, depth, start = [], 0, None
+    for kind, result, a, b, value, timestamp in RECORD.iter_unpack(data[HEADER.size + names_size:]):
+        start = timestamp if start is None else start
+        stamp = '%10.3f ms  ' % ((timestamp - start) * 1000)
+        if kind == ENTER:
+            lines.append(stamp + '| ' * depth + 'Executing:' + names[a])
+            depth += 1
+        elif kind == EXIT:
+            depth = max(depth - 1, 0)
+            lines.append(stamp + '| ' * depth + 'Result: ' + names[a] + ' -> ' + ('Success' if result else 'Failure'))
+        elif kind == ORDER:
+            lines.append(stamp + '| ' * depth + 'Order:%d %d %g' % (a, b, value))
+        elif kind == BAD_ORDER:
+            lines.append(stamp + '| ' * depth + 'Bad order:%d %d %g' % (a, b, value))
+        elif kind == TURN:
+            lines.append(stamp + 'Finish turn\n')
+    return '\n'.join(lines)
+
+
+if os.environ.get('PLANET_WARS_TRACE'):
+    enable(os.path.splitext(os.path.abspath(sys.argv[0]))[0] + '.trace')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        print('Usage: python tracing.py <bot>.trace')
+        sys.exit(1)
+    with open(sys.argv[1], 'rb') as trace_file:
+        print(decode(trace_file.read()))
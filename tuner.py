@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+#
+"""
+    Evolutionary tuner for the behavior tree. A genome is a tree spec (see bt_bot.tree_from_spec): the order of the
+    strategies, the checks and action of each, and their numeric settings such as the share of the fleet an action
+    sends. Every generation is played against the opponent bots on a sample of maps in the in-process simulator,
+    one (genome, opponent) pairing per task on all cores, and genomes that were already played are not played again.
+
+    The best spec is written as JSON; play it with PLANET_WARS_TREE=<spec.json> python behavior_tree_bot/bt_bot.py
+
+    Usage: python tuner.py [--generations N] [--population N] [--maps N] [--turns N] [--seed N] [--workers N]
+                           [--cache tuner_cache.json] [--out best_tree.json]
+"""
+import hashlib, json, logging, os, random, sys
+from multiprocessing import Pool
+
+from simulator import play_games, load_bot
+
+
+OPPONENTS = ['opponent_bots/easy_bot.py',
+             'opponent_bots/spread_bot.py',
+             'opponent_bots/aggressive_bot.py',
+             'opponent_bots/defensive_bot.py',
+             'opponent_bots/production_bot.py']
+
+# Checks and actions a genome can use, with the range of each of their settings. Integer ranges give integers.
+CHECKS = {'have_largest_fleet': {'margin': (0.5, 2.0)},
+          'if_neutral_planet_available': {}}
+ACTIONS = {'attack_weakest_enemy_planet': {'fraction': (0.1, 1.0), 'max_fleets': (1, 10)},
+           'spread_to_weakest_neutral_planet': {'fraction': (0.1, 1.0), 'max_fleets': (1, 10)}}
+MAX_STRATEGIES = 6
+
+# setup_behavior_tree's tree.
+DEFAULT_SPEC = {
+    'strategies': [
+        {'checks': [{'name': 'have_largest_fleet', 'settings': {'margin': 1.0}}],
+         'action': {'name': 'attack_weakest_enemy_planet', 'settings': {'fraction': 0.5, 'max_fleets': 1}}},
+        {'checks': [{'name': 'if_neutral_planet_available', 'settings': {}}],
+         'action': {'name': 'spread_to_weakest_neutral_planet', 'settings': {'fraction': 0.5, 'max_fleets': 1}}},
+        {'checks': [],
+         'action': {'name': 'attack_weakest_enemy_planet', 'settings': {'fraction': 0.5, 'max_fleets': 1}}}],
+    'fallback': {'name': 'attack_weakest_enemy_planet', 'settings': {'fraction': 0.5, 'max_fleets': 1}},
+}
+
+
+def genome_hash(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+############################### Variation ##################################
+def _random_setting(bounds, rng):
+    low, high = bounds
+    return rng.randint(low, high) if isinstance(low, int) else round(rng.uniform(low, high), 3)
+
+
+def _random_gene(genes, rng):
+    name = rng.choice(sorted(genes))
+    return {'name': name, 'settings': {key: _random_setting(bounds, rng) for key, bounds in genes[name].items()}}
+
+
+def random_strategy(rng):
+    checks = [_random_gene(CHECKS, rng)] if rng.random() < 0.7 else []
+    return {'checks': checks, 'action': _random_gene(ACTIONS, rng)}
+
+
+def mutate(spec, rng):
+    """ Returns a copy of the spec with one random change. """
+    spec = json.loads(json.dumps(spec))
+    strategies = spec['strategies']
+    strategy = rng.choice(strategies)
+    genes = [(gene, ACTIONS) for gene in [strategy['action'], spec['fallback']]] + \
+            [(gene, CHECKS) for gene in strategy['checks']]
+    choice = rng.randrange(6)
+
+    if choice == 0 and len(strategies) > 1:
+        i, j = rng.sample(range(len(strategies)), 2)
+        strategies[i], strategies[j] = strategies[j], strategies[i]
+    elif choice == 1 and len(strategies) < MAX_STRATEGIES:
+        strategies.insert(rng.randint(0, len(strategies)), random_strategy(rng))
+    elif choice == 2 and len(strategies) > 1:
+        strategies.remove(strategy)
+    elif choice == 3:
+        strategy['checks'] = [] if strategy['checks'] else [_random_gene(CHECKS, rng)]
+    elif choice == 4:
+        gene, pool = rng.choice(genes)
+        gene.update(_random_gene(pool, rng))
+    else:
+        # Nudge one setting by up to a tenth of its range.
+        gene, pool = rng.choice(genes)
+        if gene['settings']:
+            key = rng.choice(sorted(gene['settings']))
+            low, high = pool[gene['name']][key]
+            if isinstance(low, int):
+                value = gene['settings'][key] + rng.choice((-1, 1))
+            else:
+                value = round(gene['settings'][key] + rng.gauss(0, (high - low) / 10), 3)
+            gene['settings'][key] = min(max(value, low), high)
+    return spec
+
+
+def crossover(spec_a, spec_b, rng):
+    """ The first strategies of one parent followed by the last strategies of the other. """
+    a, b = spec_a['strategies'], spec_b['strategies']
+    strategies = a[:rng.randint(1, len(a))] + b[rng.randint(0, len(b) - 1):]
+    return json.loads(json.dumps({'strategies': strategies[:MAX_STRATEGIES],
+                                  'fallback': rng.choice((spec_a, spec_b))['fallback']}))
+
+
+############################### Evaluation ##################################
+_opponents = {}
+
+
+def play_pairing(task):
+    """ Plays one genome against one opponent on every map; returns its points (a win is 1, a draw 1/2). """
+    spec, opponent_bot, map_paths, max_turns = task
+    from behavior_tree_bot.bt_bot import tree_from_spec
+    from behavior_tree_bot.bt_nodes import compile_tree
+
+    if opponent_bot not in _opponents:
+        _opponents[opponent_bot] = load_bot(opponent_bot)
+    tree = compile_tree(tree_from_spec(spec))
+    results = play_games(tree.execute, _opponents[opponent_bot], map_paths, max_turns)
+
+    points = sum({0: 0.5, 1: 1.0}.get(result.winner, 0.0) for result in results)
+    # Ship share, as a tie-breaker between genomes with the same points.
+    share = sum(result.player_1_ships / max(result.player_1_ships + result.player_2_ships, 1) for result in results)
+    return points + 0.01 * share
+
+
+class Tuner:
+    def __init__(self, map_paths, max_turns=300, opponent_bots=OPPONENTS, num_workers=None, cache_path=None):
+        self.map_paths, self.max_turns, self.opponent_bots = list(map_paths), max_turns, list(opponent_bots)
+        self.num_workers = num_workers or os.cpu_count()
+        # Fitness by genome hash, for this set of maps, opponents and turn limit.
+        self.setup_key = genome_hash([self.map_paths, self.max_turns, self.opponent_bots])
+        self.cache_path = cache_path
+        self.cache = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as cache_file:
+                self.cache = json.load(cache_file).get(self.setup_key, {})
+
+    def evaluate(self, specs, pool):
+        """ Returns the fitness of each spec, playing only the ones not in the cache. """
+        new = {genome_hash(spec): spec for spec in specs if genome_hash(spec) not in self.cache}
+        tasks = [(spec, opponent_bot, self.map_paths, self.max_turns)
+                 for spec in new.values() for opponent_bot in self.opponent_bots]
+        points = pool.map(play_pairing, tasks)
+        for index, key in enumerate(new):
+            pairings = len(self.opponent_bots)
+            self.cache[key] = sum(points[index * pairings:(index + 1) * pairings]) / (pairings * len(self.map_paths))
+        if new and self.cache_path:
+            self._save_cache()
+        return [self.cache[genome_hash(spec)] for spec in specs]
+
+    def _save_cache(self):
+        caches = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as cache_file:
+                caches = json.load(cache_file)
+        caches[self.setup_key] = self.cache
+        with open(self.cache_path, 'w') as cache_file:
+            json.dump(caches, cache_file)
+
+    def evolve(self, generations=20, population_size=24, seed=0, elite=2):
+        """ Runs the genetic algorithm from the default tree and returns the best spec and its fitness. """
+        rng = random.Random(seed)
+        population = [DEFAULT_SPEC] + [mutate(DEFAULT_SPEC, rng) for _ in range(population_size - 1)]
+
+        with Pool(self.num_workers, initializer=logging.disable, initargs=(logging.INFO,)) as pool:
+            for generation in range(generations):
+                fitness = self.evaluate(population, pool)
+                ranked = sorted(range(len(population)), key=fitness.__getitem__, reverse=True)
+                print('generation %d: best %.3f, mean %.3f, %d genomes played' %
+                      (generation, fitness[ranked[0]], sum(fitness) / len(fitness), len(self.cache)), flush=True)
+                if generation == generations - 1:
+                    break
+
+                def select():
+                    # Tournament selection of size 3.
+                    return population[min(rng.sample(range(len(population)), 3), key=ranked.index)]
+
+                offspring = [population[index] for index in ranked[:elite]]
+                while len(offspring) < population_size:
+                    child = crossover(select(), select(), rng) if rng.random() < 0.5 else select()
+                    offspring.append(mutate(child, rng))
+                population = offspring
+
+        return population[ranked[0]], fitness[ranked[0]]
+
+
+if __name__ == '__main__':
+    settings = {'generations': 20, 'population': 24, 'maps': 10, 'turns': 300, 'seed': 0, 'workers': 0,
+                'cache': None, 'out': 'best_tree.json'}
+    args = sys.argv[1:]
+    while args:
+        name = args.pop(0).lstrip('-')
+        if name not in settings or not args:
+            print(__doc__)
+            sys.exit(1)
+        value = args.pop(0)
+        settings[name] = int(value) if isinstance(settings[name], int) else value
+
+    # bt_bot.py logs its tree whenever one is built; none of that belongs in this output.
+    logging.disable(logging.INFO)
+    maps = random.Random(settings['seed']).sample(range(1, 101), settings['maps'])
+    tuner = Tuner(['maps/map%d.txt' % num for num in sorted(maps)], settings['turns'],
+                  num_workers=settings['workers'] or None, cache_path=settings['cache'])
+    best, fitness = tuner.evolve(settings['generations'], settings['population'], settings['seed'])
+
+    with open(settings['out'], 'w') as spec_file:
+        json.dump(best, spec_file, indent=2)
+    print('Best fitness %.3f, written to %s' % (fitness, settings['out']))